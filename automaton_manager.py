@@ -1,16 +1,59 @@
 # automaton_manager.py  ── single façade the GUI talks to
 from fa_database import (
+    delete_automaton,
+    find_conversion,
+    list_summaries,
+    load_automata,
     load_automaton_by_id,
+    save_automata_to_db,
     save_automaton_to_db,
     save_input_test,
+    save_input_tests,
     save_conversion,
+    save_or_reuse,
+    stored_keys,
+    SUMMARY_PAGE,
 )
-from fa_logic import FiniteAutomaton
-from db import get_connection
+from fa_cache import cached_dfa, default_cache, simulate_many
+from fa_classifier import get_classifier
+from fa_logic import FiniteAutomaton, SubsetBudgetExceeded, equivalent, includes
+from fa_lru import load_cache
+from fa_regex import from_regex
+from fa_search import finditer_file
+from db import get_connection   # re-exported for __main__
+
+
+def _stored_pk(fa: FiniteAutomaton) -> int:
+    """Row id of an operand; a result's lineage needs it, so an unsaved
+    operand is refused before anything is written."""
+    if getattr(fa, "db_id", None) is None:
+        raise ValueError(f"Automaton {fa.name!r} is not saved; save it first.")
+    return int(fa.db_id)
+
+
+def _derive(fa: FiniteAutomaton, ctype: str, build):
+    """``build()``'s result for ``fa``, stored with lineage ``ctype``.
+
+    An earlier result of ``fa`` itself, or of any stored automaton with the
+    same fingerprint, is loaded instead of rebuilt; a freshly built result
+    that is already stored is not inserted again.  Returns (result, reused).
+    """
+    src_pk = _stored_pk(fa)
+    done = find_conversion(src_pk, fa.fingerprint(), ctype)
+    if done:
+        res_pk, res_pubid, via_pk = done
+        res = load_automaton_by_id(res_pubid)
+        if res is not None:
+            if via_pk != src_pk:
+                save_conversion(src_pk, res_pk, ctype)
+            return res, True
+    res = build()
+    pk, _, reused = save_or_reuse(res)
+    save_conversion(src_pk, pk, ctype)
+    return res, reused
 
 
 def manage_automaton(action: str, **kwargs) -> dict:
-    conn = None
     try:
         if action == "create":
             fa = FiniteAutomaton(
@@ -27,17 +70,49 @@ def manage_automaton(action: str, **kwargs) -> dict:
             fa.id = pubid
             return {"automaton": fa}
 
+        if action == "save_many":
+            # FiniteAutomaton objects, stored in one transaction
+            fas = list(kwargs["automata"])
+            save_automata_to_db(fas)
+            return {"automata": fas}
+
+        if action == "from_regex":
+            fa = from_regex(
+                kwargs["pattern"],
+                dfa=kwargs.get("dfa", False),
+                ignore_case=kwargs.get("ignore_case", False),
+                alphabet=kwargs.get("alphabet"),
+                name=kwargs.get("name"),
+            )
+            _, pubid = save_automaton_to_db(fa)
+            return {"automaton": fa}
+
         if action == "list":
-            conn = get_connection()
-            cur = conn.cursor()
-            cur.execute("SELECT id, public_id FROM NFAs ORDER BY id DESC")
-            automata = []
-            for pk, pubid in cur.fetchall():
-                fa = load_automaton_by_id(pubid)
-                if fa:
-                    fa.db_id = pk
-                    automata.append(fa)
-            return {"automata": automata}
+            return {"automata": load_automata()}
+
+        if action == "summaries":
+            # counts only, one page at a time; pass back "next" as after=
+            rows, nxt = list_summaries(after=kwargs.get("after"),
+                                       limit=kwargs.get("limit", SUMMARY_PAGE),
+                                       name=kwargs.get("name"))
+            return {"summaries": rows, "next": nxt}
+
+        if action == "delete":
+            pubid = kwargs["id"]
+            return {"deleted": True} if delete_automaton(pubid) else {"error": f"Not found: {pubid}"}
+
+        if action == "cache_stats":
+            disk = default_cache()
+            return {"loads": load_cache().stats(),
+                    "compiled": disk.stats() if disk else None}
+
+        if action == "load_many":
+            # ids= public ids; those not found are reported, not fatal
+            ids = list(kwargs["ids"])
+            automata = load_automata(ids)
+            found = {fa.id for fa in automata}
+            return {"automata": automata,
+                    "missing": [pubid for pubid in ids if pubid not in found]}
 
         if action == "load":
             pubid = kwargs["id"]
@@ -47,32 +122,108 @@ def manage_automaton(action: str, **kwargs) -> dict:
         if action == "simulate":
             fa, s = kwargs["automaton"], kwargs["input_string"]
             result = fa.simulate(s)
-            save_input_test(int(fa.db_id), s, result)
+            save_input_test(_stored_pk(fa), s, result)
             return {"result": result}
 
+        if action == "simulate_batch":
+            fa, strings = kwargs["automaton"], list(kwargs["input_strings"])
+            results = simulate_many(fa, strings)
+            if kwargs.get("record"):
+                save_input_tests(_stored_pk(fa), zip(strings, results))
+            return {"results": results, "accepted": int(sum(results))}
+
+        if action == "classify":
+            # keyed on what is stored, so a cached classifier loads nothing
+            ids = kwargs.get("ids")
+            ids = list(ids) if ids is not None else None
+            keys = stored_keys(ids)                     # oldest first without ids
+            if ids is None:
+                ids = [pubid for pubid, _, _ in keys]
+            found = {pubid for pubid, _, _ in keys}
+            missing = [pubid for pubid in ids if pubid not in found]
+            if missing:
+                return {"error": f"Not found: {missing[0]}"}
+
+            def members():
+                automata = {fa.id: fa for fa in load_automata(ids)}
+                for pubid in ids:
+                    if pubid not in automata:
+                        raise ValueError(f"Not found: {pubid}")
+                return [(pubid, automata[pubid]) for pubid in ids]
+            clf = get_classifier(tuple(keys), members)
+            return {"matches": clf.classify(kwargs["input_string"])}
+
+        if action == "search":
+            # text= scans a str/bytes in memory, path= an mmap'ed file
+            fa, limit = kwargs["automaton"], kwargs.get("limit")
+            if "path" in kwargs:
+                spans = finditer_file(fa, kwargs["path"])
+            else:
+                spans = fa.finditer(kwargs["text"])
+            matches = []
+            for span in spans:
+                if limit is not None and len(matches) >= limit:
+                    break
+                matches.append(span)
+            return {"matches": matches, "count": len(matches)}
+
         if action == "check_type":
             return {"type": kwargs["automaton"].is_dfa_check()}
 
+        if action == "equivalent":
+            same, witness = equivalent(kwargs["automaton"], kwargs["other"])
+            return {"result": same, "counterexample": witness}
+
+        if action == "includes":
+            inside, witness = includes(kwargs["automaton"], kwargs["other"])
+            return {"result": inside, "counterexample": witness}
+
         if action == "convert":
-            fa = kwargs["automaton"]
-            dfa = fa.convert_to_dfa()
-            _, pubid = save_automaton_to_db(dfa)
-            save_conversion(int(fa.db_id), int(dfa.db_id), "NFA_TO_DFA")
-            dfa.id = pubid
-            return {"automaton": dfa}
+            fa, reduction = kwargs["automaton"], {}
+
+            def build():
+                src = fa
+                if kwargs.get("reduce") and not fa.is_dfa:
+                    # shrink the NFA by simulation first; report what went
+                    src, stats = fa.reduce()
+                    reduction.update(stats)
+                return cached_dfa(src, max_states=kwargs.get("max_states"),
+                                  time_budget=kwargs.get("time_budget"))
+            try:
+                dfa, reused = _derive(fa, "NFA_TO_DFA", build)
+            except SubsetBudgetExceeded as e:
+                return {"error": str(e), "stats": e.stats, "reduction": reduction}
+            out = {"automaton": dfa, "reused": reused}
+            if reduction:
+                out["reduction"] = reduction
+            return out
 
         if action == "minimize":
             fa = kwargs["automaton"]
-            minfa = fa.minimize()
-            _, pubid = save_automaton_to_db(minfa)
-            save_conversion(int(fa.db_id), int(minfa.db_id), "DFA_MINIMIZATION")
-            minfa.id = pubid
-            return {"automaton": minfa}
+            if not fa.is_dfa:
+                raise ValueError("Minimization requires a DFA.")
+            minfa, reused = _derive(fa, "DFA_MINIMIZATION",
+                                    lambda: cached_dfa(fa, minimal=True))
+            return {"automaton": minfa, "reused": reused}
+
+        if action in FiniteAutomaton.PRODUCT_OPS:
+            fa, other = kwargs["automaton"], kwargs["other"]
+            src_pks = (_stored_pk(fa), _stored_pk(other))
+            res = fa.product(other, action, kwargs.get("minimize", False))
+            pk, pubid, reused = save_or_reuse(res)
+            for src_pk in src_pks:
+                save_conversion(src_pk, pk, f"PRODUCT_{action.upper()}")
+            return {"automaton": res, "reused": reused}
+
+        if action == "complement":
+            fa = kwargs["automaton"]
+            src_pk = _stored_pk(fa)
+            res = fa.complement(kwargs.get("alphabet"), kwargs.get("minimize", False))
+            pk, pubid, reused = save_or_reuse(res)
+            save_conversion(src_pk, pk, "COMPLEMENT")
+            return {"automaton": res, "reused": reused}
 
         return {"error": "Invalid action."}
 
     except Exception as e:
         return {"error": str(e)}
-    finally:
-        if conn:
-            conn.close()
@@ -0,0 +1,90 @@
+# bench_db.py  ── save/load latency: connection pool, row-by-row vs bulk save
+#
+#   python benchmarks/bench_db.py [transitions]
+#
+# Needs a reachable MySQL server (DB_HOST, DB_USER, ... as for the app).
+# "unpooled" reproduces the oldest behaviour: one INSERT per state and per
+# transition, each logging in on a fresh connection.  "pooled" makes the same
+# row-by-row INSERTs on one pooled connection.  "bulk" is the current
+# save_automaton_to_db: executemany inside one transaction.  "reload" is a
+# second load of the same automaton, served by the in-process load cache.
+import os, random, sys, time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import db
+import fa_database
+from fa_logic import FiniteAutomaton
+
+
+class Unpooled:
+    def acquire(self, timeout=None):
+        return db.connect()
+
+    def release(self, conn):
+        conn.close()
+
+
+@contextmanager
+def per_call_session():
+    conn = db.get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def random_nfa(transitions: int, seed: int = 0) -> FiniteAutomaton:
+    rnd = random.Random(seed)
+    n = max(2, transitions // 4)
+    states = [f"q{i}" for i in range(n)]
+    delta = {}
+    for _ in range(transitions):
+        delta.setdefault(rnd.choice(states), {}).setdefault(rnd.choice("abcd"), []) \
+            .append(rnd.choice(states))
+    return FiniteAutomaton(None, f"bench{seed}", set(states), set("abcd"), delta,
+                           "q0", {s for s in states if rnd.random() < 0.2}, False)
+
+
+def save_rows(fa):
+    """The row-at-a-time save that predates the bulk writer."""
+    with fa_database.session():
+        pk, pubid = fa_database.create_automaton(
+            fa.name, "DFA" if fa.is_dfa else "NFA", None, fa.fingerprint())
+        id_map = {s: fa_database.add_state(pk, s, s == fa.start_state,
+                                           s in fa.accept_states)
+                  for s in fa.states}
+        for src, mp in fa.transitions.items():
+            for sym, dsts in mp.items():
+                for dst in dsts if isinstance(dsts, (list, set)) else [dsts]:
+                    fa_database.add_transition(pk, id_map[src], sym, id_map[dst])
+    return pk, pubid
+
+
+def round_trip(fa, save):
+    t0 = time.perf_counter()
+    _, pubid = save(fa)
+    t1 = time.perf_counter()
+    fa_database.load_automaton_by_id(pubid)
+    t2 = time.perf_counter()
+    fa_database.load_automaton_by_id(pubid)
+    return t1 - t0, t2 - t1, time.perf_counter() - t2
+
+
+def main(transitions: int = 1_000) -> None:
+    fa_database.init_all_tables()
+    print(f"{'mode':>9} {'save s':>8} {'load s':>8} {'reload s':>9}")
+    pooled_session = fa_database.session
+    for mode in ("unpooled", "pooled", "bulk"):
+        if mode == "unpooled":
+            db._pool, fa_database.session = Unpooled(), per_call_session
+        else:
+            db._pool, fa_database.session = None, pooled_session
+        save = fa_database.save_automaton_to_db if mode == "bulk" else save_rows
+        fa = random_nfa(transitions, seed=random.randrange(1 << 30))
+        t_save, t_load, t_reload = round_trip(fa, save)
+        print(f"{mode:>9} {t_save:>8.3f} {t_load:>8.3f} {t_reload:>9.4f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000)
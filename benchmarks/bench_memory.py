@@ -0,0 +1,66 @@
+# bench_memory.py  ── retained memory of a large DFA: dict/set layout vs CSR
+#
+#   python benchmarks/bench_memory.py [states]
+#
+# The same random DFA over {a, b, c, d} is held once in the old layout
+# (sets of names plus a dict-of-dicts of transitions) and once as a
+# FiniteAutomaton on its compact graph.  Sizes come from tracemalloc.
+import gc, os, random, sys, tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fa_logic import FiniteAutomaton
+
+ALPHABET = "abcd"
+
+
+def random_table(n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    # names shaped like convert_to_dfa output: comma-joined NFA state sets
+    names = [",".join(f"q{rnd.randrange(n)}" for _ in range(3)) + f"#{i}" for i in range(n)]
+    table = array("i", (rnd.randrange(n) if rnd.random() < 0.9 else -1
+                        for _ in range(n * len(ALPHABET))))
+    accept = [rnd.random() < 0.3 for _ in range(n)]
+    return names, table, accept
+
+
+def legacy_layout(names, table, accept):
+    k = len(ALPHABET)
+    transitions = {}
+    for i, name in enumerate(names):
+        row = {ALPHABET[c]: names[t] for c, t in enumerate(table[i * k:(i + 1) * k]) if t >= 0}
+        if row:
+            transitions[name] = row
+    return (set(names), set(ALPHABET), transitions,
+            {s for s, a in zip(names, accept) if a})
+
+
+def compact_layout(names, table, accept):
+    return FiniteAutomaton.from_table("bench", "bench", names, list(ALPHABET),
+                                      table, 0, accept)
+
+
+def retained(build, *args) -> tuple[object, int]:
+    """Build an object and return it with the bytes it keeps alive."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build(*args)
+    gc.collect()
+    return obj, tracemalloc.get_traced_memory()[0] - before
+
+
+def main(n: int = 200_000) -> None:
+    names, table, accept = random_table(n)
+    tracemalloc.start()
+    # the name strings are shared by both layouts; only the structure counts
+    old, old_bytes = retained(legacy_layout, names, table, accept)
+    del old
+    new, new_bytes = retained(compact_layout, list(names), table, accept)
+    tracemalloc.stop()
+    print(f"{'states':>8} {'dict/set MB':>12} {'compact MB':>11} {'ratio':>6}")
+    print(f"{n:>8} {old_bytes / 2**20:>12.1f} {new_bytes / 2**20:>11.1f}"
+          f" {old_bytes / max(1, new_bytes):>6.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
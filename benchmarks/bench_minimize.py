@@ -0,0 +1,48 @@
+# bench_minimize.py  ── scaling of FiniteAutomaton.minimize on random DFAs
+#
+#   python benchmarks/bench_minimize.py [max_states]
+#
+# Each DFA is a random complete DFA over {a, b, c} whose states come in
+# blocks of four equivalent copies, so minimization has real work to do.
+import os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fa_logic import FiniteAutomaton
+
+
+def random_dfa(n: int, alphabet="abc", seed: int = 0) -> FiniteAutomaton:
+    rnd = random.Random(seed)
+    core = max(1, n // 4)
+    base = {c: {a: rnd.randrange(core) for a in alphabet} for c in range(core)}
+    finals = {c for c in range(core) if rnd.random() < 0.3}
+    # state i behaves like core state i % core, successors picked among copies
+    transitions = {
+        f"s{i}": {a: f"s{base[i % core][a] + core * rnd.randrange(4)}"
+                  for a in alphabet}
+        for i in range(core * 4)
+    }
+    return FiniteAutomaton(
+        id="bench", name="bench",
+        states=set(transitions), alphabet=set(alphabet),
+        transitions=transitions, start_state="s0",
+        accept_states={f"s{i}" for i in range(core * 4) if i % core in finals},
+        is_dfa=True,
+    )
+
+
+def main(max_states: int = 100_000) -> None:
+    print(f"{'states':>8} {'minimal':>8} {'compile s':>10} {'minimize s':>11}")
+    n = 1_000
+    while n <= max_states:
+        fa = random_dfa(n, seed=n)
+        t0 = time.perf_counter()
+        fa.compile()
+        t1 = time.perf_counter()
+        m = fa.minimize()
+        t2 = time.perf_counter()
+        print(f"{len(fa.states):>8} {len(m.states):>8} {t1 - t0:>10.3f} {t2 - t1:>11.3f}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
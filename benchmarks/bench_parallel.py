@@ -0,0 +1,46 @@
+# bench_parallel.py  ── serial table walk vs. chunked process-pool simulation
+#
+#   python benchmarks/bench_parallel.py [length] [states]
+import os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fa_logic import FiniteAutomaton
+from fa_parallel import simulate_parallel
+
+
+def random_complete_dfa(n: int, alphabet: str, seed: int = 0) -> FiniteAutomaton:
+    rnd = random.Random(seed)
+    transitions = {f"s{i}": {a: f"s{rnd.randrange(n)}" for a in alphabet}
+                   for i in range(n)}
+    return FiniteAutomaton(
+        id="bench", name="bench", states=set(transitions),
+        alphabet=set(alphabet), transitions=transitions, start_state="s0",
+        accept_states={f"s{i}" for i in range(0, n, 2)}, is_dfa=True,
+    )
+
+
+def main(length: int = 20_000_000, states: int = 64) -> None:
+    alphabet = "abcd"
+    fa = random_complete_dfa(states, alphabet)
+    rnd = random.Random(1)
+    text = "".join(rnd.choices(alphabet, k=length))
+    fa.compile()
+
+    t0 = time.perf_counter()
+    expected = fa.simulate(text)
+    serial = time.perf_counter() - t0
+    print(f"input {length:,} symbols, {states} states, {os.cpu_count()} CPUs")
+    print(f"{'serial':>10}: {serial:7.3f}s")
+    workers = 2
+    while workers <= (os.cpu_count() or 1):
+        t0 = time.perf_counter()
+        got = simulate_parallel(fa, text, workers)
+        took = time.perf_counter() - t0
+        assert got == expected
+        print(f"{workers:>2} workers: {took:7.3f}s  ({serial / took:4.1f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
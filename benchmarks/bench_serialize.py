@@ -0,0 +1,86 @@
+# bench_serialize.py  ── load/save time: JSON vs binary record vs MySQL
+#
+#   python benchmarks/bench_serialize.py [max_states] [--db]
+#
+# JSON is the indented to_dict() dump the old GUI saved; the binary record is
+# FiniteAutomaton.to_bytes() read back with from_buffer() over an mmap of
+# the file.  With --db the automaton also goes through save_automaton_to_db /
+# load_automaton_by_id (needs a reachable MySQL server; slow to save).
+import json, mmap, os, random, sys, tempfile, time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fa_logic import FiniteAutomaton
+
+ALPHABET = "abcd"
+
+
+def random_dfa(n: int, seed: int = 0) -> FiniteAutomaton:
+    rnd = random.Random(seed)
+    table = array("i", (rnd.randrange(n) if rnd.random() < 0.9 else -1
+                        for _ in range(n * len(ALPHABET))))
+    return FiniteAutomaton.from_table("bench", "bench", [f"q{i}" for i in range(n)],
+                                      list(ALPHABET), table, 0,
+                                      [rnd.random() < 0.3 for _ in range(n)])
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def json_round_trip(fa, path):
+    def save():
+        with open(path, "w") as f:
+            json.dump(fa.to_dict(), f, indent=2)
+
+    def load():
+        with open(path) as f:
+            return FiniteAutomaton(**json.load(f))
+    _, t_save = timed(save)
+    back, t_load = timed(load)
+    return t_save, t_load, os.path.getsize(path), back
+
+
+def binary_round_trip(fa, path):
+    def save():
+        with open(path, "wb") as f:
+            f.write(fa.to_bytes())
+
+    def load():
+        with open(path, "rb") as f:
+            return FiniteAutomaton.from_buffer(
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    _, t_save = timed(save)
+    back, t_load = timed(load)
+    return t_save, t_load, os.path.getsize(path), back
+
+
+def db_round_trip(fa):
+    from fa_database import load_automaton_by_id, save_automaton_to_db
+    (_, pubid), t_save = timed(save_automaton_to_db, fa)
+    back, t_load = timed(load_automaton_by_id, pubid)
+    return t_save, t_load, 0, back
+
+
+def main(max_states: int = 100_000, use_db: bool = False) -> None:
+    print(f"{'states':>8} {'format':>7} {'save s':>8} {'load s':>8} {'MB':>7}")
+    tmp = tempfile.mkdtemp()
+    n = 1_000
+    while n <= max_states:
+        fa = random_dfa(n, seed=n)
+        runs = [("json", json_round_trip, (fa, os.path.join(tmp, "fa.json"))),
+                ("binary", binary_round_trip, (fa, os.path.join(tmp, "fa.bin")))]
+        if use_db:
+            runs.append(("mysql", db_round_trip, (fa,)))
+        for label, run, args in runs:
+            t_save, t_load, size, back = run(*args)
+            assert back.transitions.to_dict() == fa.transitions.to_dict()
+            print(f"{n:>8} {label:>7} {t_save:>8.3f} {t_load:>8.3f} {size / 2**20:>7.2f}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--db"]
+    main(int(args[0]) if args else 100_000, "--db" in sys.argv)
@@ -1,7 +1,25 @@
 # db.py  ── single source of truth for MySQL connections + pretty IDs
-import os, uuid, mysql.connector
+#
+# Connections come from one process-wide pool: get_connection() checks one
+# out and its close() hands it back instead of hanging up.  session() lends
+# the same connection to everything inside a ``with`` block on one thread,
+# so a helper that saves a whole automaton costs one checkout, not one TCP
+# handshake + login per row.  transaction() does the same and commits (or
+# rolls back) everything inside it at once.
+import os, threading, time, uuid, mysql.connector
+from contextlib import contextmanager
 
-def get_connection():
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))          # seconds to wait for a free connection
+HEALTH_CHECK_AFTER = float(os.getenv("DB_HEALTH_CHECK_AFTER", 30))  # idle seconds before a ping
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+def connect():
+    """A new, unpooled connection."""
     return mysql.connector.connect(
         host=os.getenv("DB_HOST", "localhost"),
         user=os.getenv("DB_USER", "root"),
@@ -11,6 +29,142 @@ def get_connection():
         autocommit=True,
     )
 
+
+def _close_quietly(conn) -> None:
+    try:
+        conn.close()
+    except mysql.connector.Error:
+        pass
+
+
+class ConnectionPool:
+    """At most ``size`` connections, checked out one thread at a time.
+
+    Idle connections are reused most-recent first.  One that sat idle for
+    ``check_after`` seconds is pinged before it is handed out and replaced
+    if the server dropped it; one returned mid-transaction is rolled back.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, factory=connect,
+                 check_after: float = HEALTH_CHECK_AFTER):
+        self.size, self.check_after = size, check_after
+        self._factory = factory
+        self._idle = []                 # (connection, time it was returned)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self, timeout: float = POOL_TIMEOUT):
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolTimeout(f"No free database connection after {timeout}s "
+                              f"(pool size {self.size}).")
+        try:
+            while True:
+                with self._lock:
+                    item = self._idle.pop() if self._idle else None
+                if item is None:
+                    return self._factory()
+                conn, since = item
+                if time.monotonic() - since < self.check_after or conn.is_connected():
+                    return conn
+                _close_quietly(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        except mysql.connector.Error:
+            _close_quietly(conn)
+        finally:
+            self._slots.release()
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            _close_quietly(conn)
+
+
+class PooledConnection:
+    """A checked-out connection; close() returns it to its pool."""
+    __slots__ = ("_conn", "_pool")
+
+    def __init__(self, pool: ConnectionPool, conn):
+        self._pool, self._conn = pool, conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+
+def get_connection() -> PooledConnection:
+    pool = get_pool()
+    return PooledConnection(pool, pool.acquire())
+
+
+@contextmanager
+def session():
+    """Connection shared by every ``with session()`` nested in this one on
+    the current thread; it goes back to the pool when the outermost exits."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        yield conn
+        return
+    conn = _local.conn = get_connection()
+    try:
+        yield conn
+    finally:
+        _local.conn = None
+        conn.close()
+
+
+@contextmanager
+def transaction():
+    """session() whose statements commit together when the outermost
+    transaction() exits, and roll back if it raises."""
+    with session() as conn:
+        if getattr(_local, "in_transaction", False):
+            yield conn
+            return
+        conn.start_transaction()
+        _local.in_transaction = True
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            _local.in_transaction = False
+
+
 def make_public_id(name: str | None = None) -> str:
     if name:
         slug = "".join(c.lower() for c in name if c.isalnum() or c in "-_")
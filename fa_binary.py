@@ -0,0 +1,144 @@
+# fa_binary.py  ── versioned binary format of a FiniteAutomaton
+#
+# Layout (integers in the writer's byte order, which the header records):
+#
+#   header  magic "FAUT", version, byte order, flags (is_dfa, has id,
+#           has name), states n, symbols, alphabet size, edges E, start
+#   int32   row_ptr (n + 1), edge_sym (E), edge_dst (E)  ── the CSR graph
+#   uint8   n accept flags, zero-padded to a multiple of 4
+#   strings id, name, state names, symbols, alphabet
+#
+# A string table is int32 offsets (count + 1) followed by the UTF-8 blob.
+# Reading a buffer (bytes, memoryview, mmap) keeps the int32 arrays and the
+# accept flags as memoryviews into it; only the strings are decoded.
+import operator
+import struct
+import sys
+from array import array
+
+from fa_compact import CompactGraph
+from fa_engine import CharRange
+
+MAGIC = b"FAUT"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHBBiiiii4x")
+_LITTLE = sys.byteorder == "little"
+_IS_DFA, _HAS_ID, _HAS_NAME = 1, 2, 4
+
+
+# ── pieces shared with fa_cache ──────────────────────────────────────────────
+def label_text(label) -> str:
+    """One string per transition label: "s" + symbol, or "r" + lo + hi."""
+    if isinstance(label, CharRange):
+        return "r" + label.lo + label.hi
+    return "s" + label
+
+
+def text_label(text: str):
+    if text[:1] == "s":
+        return text[1:]
+    if text[:1] == "r" and len(text) == 3:
+        return CharRange(text[1], text[2])
+    raise ValueError(f"Corrupt transition label {text!r}.")
+
+
+def pack_strings(strings) -> bytes:
+    raw = [s.encode("utf-8", "surrogatepass") for s in strings]
+    offsets = array("i", [0])
+    for s in raw:
+        offsets.append(offsets[-1] + len(s))
+    return offsets.tobytes() + b"".join(raw)
+
+
+def unpack_strings(view: memoryview, pos: int, count: int) -> tuple[list[str], int]:
+    """``count`` strings of the table at ``pos``, and the offset past it."""
+    end = pos + 4 * (count + 1)
+    if end > len(view):
+        raise ValueError("Truncated string table.")
+    offsets = view[pos:end].cast("i")
+    if end + offsets[count] > len(view):
+        raise ValueError("Truncated string table.")
+    blob = bytes(view[end:end + offsets[count]])
+    return ([blob[offsets[i]:offsets[i + 1]].decode("utf-8", "surrogatepass")
+             for i in range(count)], end + offsets[count])
+
+
+def padded(data) -> bytes:
+    return bytes(data) + bytes(-len(data) % 4)
+
+
+def int32s(view: memoryview, pos: int, count: int) -> tuple[memoryview, int]:
+    """int32 view of ``count`` items at ``pos``, and the offset past it."""
+    end = pos + 4 * count
+    if count < 0 or end > len(view):
+        raise ValueError("Truncated array.")
+    return view[pos:end].cast("i"), end
+
+
+def check_range(values, lo: int, hi: int, what: str) -> None:
+    """ValueError unless every value lies in [lo, hi)."""
+    if len(values) and (min(values) < lo or max(values) >= hi):
+        raise ValueError(f"Corrupt record: {what} out of range.")
+
+
+# ── automaton records ────────────────────────────────────────────────────────
+def dumps(id, name, start_state, is_dfa, graph: CompactGraph) -> bytes:
+    n, edges = len(graph.names), len(graph.edge_sym)
+    alphabet = sorted(graph.alphabet)
+    flags = (_IS_DFA * bool(is_dfa) | _HAS_ID * (id is not None)
+             | _HAS_NAME * (name is not None))
+    strings = [s for s in (id, name) if s is not None] + list(graph.names) \
+        + [label_text(a) for a in graph.symbols] + [label_text(a) for a in alphabet]
+    return b"".join((
+        _HEADER.pack(MAGIC, VERSION, _LITTLE, flags, n, len(graph.symbols),
+                     len(alphabet), edges, graph.index.get(start_state, -1)),
+        array("i", graph.row_ptr).tobytes(),
+        array("i", graph.edge_sym).tobytes(),
+        array("i", graph.edge_dst).tobytes(),
+        padded(graph.accept),
+        pack_strings(strings),
+    ))
+
+
+def loads(buf):
+    """(id, name, start_state, is_dfa, graph) of a record; the graph's
+    arrays are views into ``buf``, which must stay alive and unchanged."""
+    view = memoryview(buf)
+    if len(view) < _HEADER.size:
+        raise ValueError("Truncated automaton record.")
+    magic, version, little, flags, n, n_sym, n_alpha, edges, start = \
+        _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not an automaton record.")
+    if version != VERSION or bool(little) != _LITTLE:
+        raise ValueError(f"Unsupported record version {version} or byte order.")
+    if min(n, n_sym, n_alpha) < 0:
+        raise ValueError("Corrupt automaton record.")
+    row_ptr, pos = int32s(view, _HEADER.size, n + 1)
+    edge_sym, pos = int32s(view, pos, edges)
+    edge_dst, pos = int32s(view, pos, edges)
+    if pos + n > len(view):
+        raise ValueError("Truncated automaton record.")
+    accept = view[pos:pos + n]
+    pos += n + (-n % 4)
+    if row_ptr[0] != 0 or row_ptr[n] != edges \
+            or not all(map(operator.le, row_ptr[:n], row_ptr[1:])):
+        raise ValueError("Corrupt record: row pointers.")
+    check_range(edge_sym, 0, n_sym, "edge symbol")
+    check_range(edge_dst, 0, n, "edge target")
+    if not -1 <= start < n:
+        raise ValueError("Corrupt record: start state out of range.")
+    has_id, has_name = bool(flags & _HAS_ID), bool(flags & _HAS_NAME)
+    heads = has_id + has_name
+    strings, _ = unpack_strings(view, pos, heads + n + n_sym + n_alpha)
+    id = strings[0] if has_id else None
+    name = strings[has_id] if has_name else None
+    names = strings[heads:heads + n]
+    symbols = [text_label(s) for s in strings[heads + n:heads + n + n_sym]]
+    alphabet = frozenset(text_label(s) for s in strings[heads + n + n_sym:])
+    if len(set(names)) != n or len(set(symbols)) != n_sym:
+        raise ValueError("Corrupt record: repeated state or symbol.")
+    graph = CompactGraph(names, symbols, alphabet, row_ptr, edge_sym, edge_dst, accept)
+    return id, name, names[start] if start >= 0 else None, \
+        bool(flags & _IS_DFA), graph
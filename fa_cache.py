@@ -0,0 +1,251 @@
+# fa_cache.py  ── on-disk, content-addressed cache of determinized automata
+#
+# Entries are keyed by the source automaton's fingerprint plus what was
+# derived from it ("dfa": its subset construction, "min": its minimal DFA),
+# so any process that meets an isomorphic automaton again skips the work.
+# An entry holds the compiled table of the result in a flat binary layout:
+#
+#   header  magic, version, byte order, states n, classes k, start,
+#           symbol count, alphabet size
+#   int32   class of every symbol
+#   int32   n × k transition table (DEAD = -1)
+#   uint8   n accept flags, zero-padded to a multiple of 4
+#   strings state names, symbols and alphabet (see fa_binary)
+#
+# Reads mmap the file and hand out the table and accept flags as memoryviews
+# into the mapping, so nothing proportional to n × k is copied.  Writes go to
+# a temporary file that is renamed into place; the directory is kept under a
+# byte budget by evicting the least recently used entries (file mtime, which
+# every hit refreshes).
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from fa_binary import (check_range, int32s, label_text, pack_strings, padded, text_label,
+                       unpack_strings)
+from fa_engine import CompiledDFA, SubsetBudgetExceeded
+from fa_logic import FiniteAutomaton, derived_id
+
+MAGIC = b"FADC"
+VERSION = 1
+DEFAULT_MAX_BYTES = 256 << 20
+BATCH_MAX_STATES = 50_000       # subset-construction budget of simulate_many
+
+_HEADER = struct.Struct("<4sHHiiiii4x")
+_LITTLE = sys.byteorder == "little"
+
+
+def pack_dfa(eng: CompiledDFA, alphabet) -> bytes:
+    """Entry bytes for a compiled DFA and the alphabet of its automaton."""
+    n, k = len(eng.state_names), eng.n_classes
+    labels = list(eng.symbols) + sorted(alphabet)
+    return b"".join((
+        _HEADER.pack(MAGIC, VERSION, _LITTLE, n, k, eng.start,
+                     len(eng.symbols), len(labels) - len(eng.symbols)),
+        array("i", eng.classes()).tobytes(),
+        array("i", eng.table).tobytes(),
+        padded(bytes(map(bool, eng.accept))),
+        pack_strings(list(eng.state_names) + [label_text(a) for a in labels]),
+    ))
+
+
+def unpack_dfa(buf) -> tuple[CompiledDFA, frozenset]:
+    """(engine, alphabet) of an entry.  ``buf`` may be a memoryview of an
+    mmap: the engine's table and accept flags then point into it."""
+    view = memoryview(buf)
+    if len(view) < _HEADER.size:
+        raise ValueError("Truncated cache entry.")
+    magic, version, little, n, k, start, n_sym, n_alpha = _HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION or bool(little) != _LITTLE:
+        raise ValueError("Not a cache entry of this version and byte order.")
+    if min(n, k, n_sym, n_alpha) < 0:
+        raise ValueError("Corrupt cache entry.")
+    classes, pos = int32s(view, _HEADER.size, n_sym)
+    table, pos = int32s(view, pos, n * k)
+    if pos + n > len(view):
+        raise ValueError("Truncated cache entry.")
+    accept = view[pos:pos + n]
+    check_range(classes, 0, k, "symbol class")
+    check_range(table, -1, n, "transition target")
+    if not -1 <= start < n:
+        raise ValueError("Corrupt cache entry: start state out of range.")
+    strings, _ = unpack_strings(view, pos + n + (-n % 4), n + n_sym + n_alpha)
+    symbols = [text_label(s) for s in strings[n:n + n_sym]]
+    if len(set(strings[:n])) != n or len(set(symbols)) != n_sym:
+        raise ValueError("Corrupt cache entry: repeated state or symbol.")
+    eng = CompiledDFA(strings[:n], symbols, table, start, accept,
+                      classes=list(classes), n_classes=k)
+    return eng, frozenset(text_label(s) for s in strings[n + n_sym:])
+
+
+class DiskCache:
+    """Directory of entries named ``<key>.fadc``, at most ``max_bytes`` large."""
+
+    SUFFIX = ".fadc"
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root, self.max_bytes = root, max_bytes
+        os.makedirs(root, exist_ok=True)
+        self.hits = self.misses = self.evictions = 0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key + self.SUFFIX)
+
+    def get(self, key: str):
+        """(CompiledDFA, alphabet) stored under ``key``, or None."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as fh:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            self.misses += 1
+            return None
+        except ValueError:          # an empty file cannot be mapped: corrupt too
+            mm = b""
+        try:
+            entry = unpack_dfa(mm)
+        except Exception:           # corrupt entry: a miss, and gone for next time
+            del mm
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)          # most recently used
+        except OSError:
+            pass
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, eng: CompiledDFA, alphabet) -> None:
+        data = pack_dfa(eng, alphabet)
+        if len(data) > self.max_bytes:
+            return
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.root)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.path(key))
+        except OSError:             # e.g. the old entry is mapped on Windows
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until the directory fits."""
+        entries = []
+        with os.scandir(self.root) as it:
+            for e in it:
+                if e.name.endswith(self.SUFFIX):
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:         # still mapped somewhere (Windows)
+                continue
+            total -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        for name in os.listdir(self.root):
+            if name.endswith(self.SUFFIX):
+                os.unlink(os.path.join(self.root, name))
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
+
+_default = None
+
+
+def default_cache() -> DiskCache | None:
+    """Process-wide cache in $FA_CACHE_DIR (default ~/.cache/automata),
+    bounded by $FA_CACHE_MAX_BYTES; None when FA_CACHE_DIR is set empty."""
+    global _default
+    if _default is None:
+        root = os.getenv("FA_CACHE_DIR",
+                         os.path.join(os.path.expanduser("~"), ".cache", "automata"))
+        if not root:
+            return None
+        _default = DiskCache(root, int(os.getenv("FA_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)))
+    return _default
+
+
+def _key(fa, minimal: bool) -> str:
+    return f"{fa.fingerprint()}.{'min' if minimal else 'dfa'}"
+
+
+def _derive(fa, minimal, max_states, time_budget) -> FiniteAutomaton:
+    dfa = fa.convert_to_dfa(max_states, time_budget)
+    return dfa.minimize() if minimal else dfa
+
+
+def compiled_dfa(fa, minimal: bool = False, cache: DiskCache | None = None,
+                 max_states: int | None = None,
+                 time_budget: float | None = None) -> CompiledDFA:
+    """Table of ``fa``'s DFA (its minimal DFA if ``minimal``), read through
+    ``cache`` (default: default_cache()).  A DFA that needs no minimizing
+    is compiled directly."""
+    if fa.is_dfa and not minimal:
+        return fa.compile()
+    cache = cache or default_cache()
+    hit = cache.get(_key(fa, minimal)) if cache else None
+    if hit is not None:
+        return hit[0]
+    res = _derive(fa, minimal, max_states, time_budget)
+    if cache:
+        cache.put(_key(fa, minimal), res.compile(), res.alphabet)
+    return res.compile()
+
+
+def cached_dfa(fa, minimal: bool = False, cache: DiskCache | None = None,
+               max_states: int | None = None,
+               time_budget: float | None = None) -> FiniteAutomaton:
+    """Like compiled_dfa but as a FiniteAutomaton, named as convert_to_dfa /
+    minimize would name it.  On a hit the state names are those of whichever
+    isomorphic automaton was derived first."""
+    if fa.is_dfa and not minimal:
+        return fa
+    cache = cache or default_cache()
+    hit = cache.get(_key(fa, minimal)) if cache else None
+    if hit is None:
+        res = _derive(fa, minimal, max_states, time_budget)
+        if cache:
+            cache.put(_key(fa, minimal), res.compile(), res.alphabet)
+        return res
+    eng, alphabet = hit
+    name = fa.name if fa.is_dfa else f"{fa.name}_DFA"
+    if minimal:
+        name = f"{name}_Minimized"
+    id = derived_id(fa.id, "min" if minimal else "dfa")
+    res = FiniteAutomaton.from_table(id, name, eng.state_names, eng.symbols,
+                                     eng.table, eng.start, eng.accept,
+                                     alphabet, eng.classes())
+    res._engines["dfa"] = eng
+    return res
+
+
+def simulate_many(fa, input_strings, cache: DiskCache | None = None,
+                  max_states: int = BATCH_MAX_STATES):
+    """Batch acceptance on the (cached) DFA table of ``fa``; an NFA whose
+    DFA outgrows ``max_states`` is run string by string instead."""
+    try:
+        eng = compiled_dfa(fa, cache=cache, max_states=max_states)
+    except SubsetBudgetExceeded:
+        return fa.simulate_many(input_strings)
+    return eng.accepts_many(input_strings)
@@ -0,0 +1,135 @@
+# fa_classifier.py  ── which of N automata accept a string, in one scan
+#
+# The member DFAs are run as one tagged product automaton: a product state
+# is the tuple of member states, and bit i of its accept mask says whether
+# member i accepts there.  Product states and their moves are built the
+# first time a scan needs them and kept, so repeated scans settle into a
+# single table walk no matter how many members there are.
+from collections import OrderedDict
+
+from fa_cache import compiled_dfa
+from fa_engine import DEAD, CharClasses, class_for, refine
+
+DEFAULT_MAX_STATES = 100_000
+
+
+class Classifier:
+    """Tagged union DFA over ``members`` (a list of ``(id, FiniteAutomaton)``).
+
+    At most ``max_states`` product states are memoised; beyond that, moves
+    out of unknown states are recomputed member by member on every scan.
+    """
+
+    def __init__(self, members, max_states: int = DEFAULT_MAX_STATES):
+        self.ids = [mid for mid, _ in members]
+        self.max_states = max_states
+        dfas = [compiled_dfa(fa, minimal=True) for _, fa in members]
+        self._dfas = dfas
+        # global symbols: every member's atoms, cut at each other's boundaries
+        symbols = refine({s for d in dfas for s in d.symbols})
+        self.class_of = {s: i for i, s in enumerate(symbols)}
+        self._chars = CharClasses(self.class_of, len(symbols))
+        # _cols[c][m]: member m's own class for global class c (None: absent)
+        self._cols = [[class_for(d, s) for d in dfas] for s in symbols]
+        self._index = {}
+        self._tuples, self._rows, self._accept = [], [], []
+        self._dead = -1
+        self._intern(tuple(d.start for d in dfas))
+
+    def __len__(self):
+        return len(self._tuples)
+
+    def _intern(self, tup) -> int:
+        """Id of product state ``tup``, or -1 once the memo is full."""
+        sid = self._index.get(tup)
+        if sid is None:
+            if len(self._tuples) >= self.max_states:
+                return -1
+            sid = self._index[tup] = len(self._tuples)
+            self._tuples.append(tup)
+            self._rows.append([None] * len(self._cols))
+            self._accept.append(self._mask_of(tup))
+            if all(s == DEAD for s in tup):
+                self._dead = sid
+        return sid
+
+    def _mask_of(self, tup) -> int:
+        mask = 0
+        for m, (d, s) in enumerate(zip(self._dfas, tup)):
+            if s != DEAD and d.accept[s]:
+                mask |= 1 << m
+        return mask
+
+    def _advance(self, tup, c):
+        return tuple(
+            d.table[s * d.n_classes + mc] if s != DEAD and mc is not None else DEAD
+            for d, s, mc in zip(self._dfas, tup, self._cols[c]))
+
+    def expand(self) -> int:
+        """Eagerly build product states (up to max_states); returns the count."""
+        i = 0
+        while i < len(self._tuples):
+            row = self._rows[i]
+            for c in range(len(self._cols)):
+                if row[c] is None:
+                    sid = self._intern(self._advance(self._tuples[i], c))
+                    if sid >= 0:
+                        row[c] = sid
+            i += 1
+        return len(self._tuples)
+
+    def accept_mask(self, input_string: str) -> int:
+        """Bit i set iff member i accepts the input."""
+        rows = self._rows
+        codes = self._chars.encode(input_string)
+        if codes is None:
+            return 0
+        sid, tup = 0, None          # tup is set only while off the memo
+        for c in codes:
+            if tup is None:
+                nxt = rows[sid][c]
+                if nxt is None:
+                    t2 = self._advance(self._tuples[sid], c)
+                    nxt = self._intern(t2)
+                    if nxt < 0:
+                        tup = t2
+                        continue
+                    rows[sid][c] = nxt
+                sid = nxt
+                if sid == self._dead:
+                    return 0
+            else:
+                tup = self._advance(tup, c)
+                nxt = self._intern(tup)
+                if nxt >= 0:
+                    sid, tup = nxt, None
+        return self._mask_of(tup) if tup is not None else self._accept[sid]
+
+    def classify(self, input_string: str) -> list:
+        """Ids of every member that accepts the input."""
+        mask = self.accept_mask(input_string)
+        return [self.ids[m] for m in range(len(self.ids)) if mask >> m & 1]
+
+
+# ── cache of built classifiers ───────────────────────────────────────────────
+CACHE_SIZE = 16
+_cache = OrderedDict()      # key → Classifier
+
+
+def get_classifier(key: tuple, load) -> Classifier:
+    """Classifier cached under ``key``; on a miss it is built from
+    ``load()``, the (id, FiniteAutomaton) members.
+
+    ``key`` must change whenever a member does.  Stored automata never
+    change after they are saved, so for them one (public_id, db_id,
+    fingerprint) per member will do, and a hit neither loads nor reads
+    any member.
+    """
+    clf = _cache.get(key)
+    if clf is not None:
+        _cache.move_to_end(key)
+        return clf
+    clf = _cache[key] = Classifier(load())
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return clf
@@ -0,0 +1,420 @@
+# fa_compact.py  ── compact backing store of a FiniteAutomaton
+#
+# State names and symbols are interned once into index tables; transitions
+# are kept CSR style in three array('i'): the edges of state i are
+# edge_sym[row_ptr[i]:row_ptr[i+1]] / edge_dst[...], one edge per target
+# and grouped by symbol, and acceptance is one byte per state.  The
+# dict-of-dicts shape older code expects is served by read-only views.
+#
+# Character ranges (CharRange labels) are cut into disjoint atoms when the
+# graph is built, so every engine sees plain, non-overlapping symbols; the
+# views glue the atoms of a row back into ranges.
+import sys
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping, Set
+
+from fa_engine import EPSILON, CharRange, label_span, refine, split_labels
+
+
+def _targets(dst):
+    return (dst,) if isinstance(dst, str) else dst
+
+
+def _uncovered(labels, ranges):
+    """``labels`` minus the single characters some range in ``ranges``
+    already covers (they would only cut that range into pieces)."""
+    merged = []
+    for lo, hi in sorted(label_span(r) for r in ranges):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    starts = [lo for lo, _ in merged]
+    out = set()
+    for a in labels:
+        sp = label_span(a)
+        r = bisect_right(starts, sp[0]) - 1 if sp else -1
+        if r < 0 or sp[1] > merged[r][1]:
+            out.add(a)
+    return out
+
+
+class CompactGraph:
+    __slots__ = ("names", "index", "symbols", "sym_index", "alphabet",
+                 "row_ptr", "edge_sym", "edge_dst", "accept", "_classes")
+
+    def __init__(self, names, symbols, alphabet, row_ptr, edge_sym, edge_dst, accept):
+        self.names = names
+        self.index = {s: i for i, s in enumerate(names)}
+        self.symbols = symbols
+        self.sym_index = {a: i for i, a in enumerate(symbols)}
+        self.alphabet = alphabet
+        self.row_ptr, self.edge_sym, self.edge_dst = row_ptr, edge_sym, edge_dst
+        self.accept = accept
+        self._classes = None
+
+    @classmethod
+    def from_dicts(cls, states, alphabet, transitions, accept_states):
+        # every name that appears anywhere gets an index, even if `states` forgot it
+        names = sorted(set(states) | set(transitions) | set(accept_states)
+                       | {t for mp in transitions.values()
+                          for d in mp.values() for t in _targets(d)})
+        index = {s: i for i, s in enumerate(names)}
+        alphabet = frozenset(alphabet)
+        used = {a for mp in transitions.values() for a in mp}
+        ranges = [a for a in used if isinstance(a, CharRange)]
+        parts = split_labels(used | _uncovered(alphabet - used, ranges))
+        symbols = sorted({a for atoms in parts.values() for a in atoms})
+        col = {a: i for i, a in enumerate(symbols)}
+
+        row_ptr = array("i", [0])
+        edge_sym, edge_dst = array("i"), array("i")
+        for s in names:
+            mp = transitions.get(s)
+            if mp:
+                # overlapping labels of one row meet on their shared atoms
+                moves = {}
+                for sym, dst in mp.items():
+                    for atom in parts[sym]:
+                        group = moves.setdefault(col[atom], [])
+                        for t in _targets(dst):
+                            if index[t] not in group:
+                                group.append(index[t])
+                for c in sorted(moves):
+                    for t in moves[c]:
+                        edge_sym.append(c)
+                        edge_dst.append(t)
+            row_ptr.append(len(edge_sym))
+        accept = bytearray(len(names))
+        for s in accept_states:
+            accept[index[s]] = 1
+        return cls(names, symbols, alphabet, row_ptr, edge_sym, edge_dst, accept)
+
+    @classmethod
+    def from_table(cls, names, symbols, table, accept, alphabet=None, dead=-1,
+                   cols=None):
+        """Graph of a dense DFA table with one row per name.
+
+        Symbol ``symbols[j]`` reads column ``cols[j]`` (default ``j``), so a
+        table over symbol classes expands back to per-symbol edges here.
+        """
+        if cols is None:
+            cols = range(len(symbols))
+        k = len(table) // len(names) if names else 0
+        row_ptr = array("i", [0])
+        edge_sym, edge_dst = array("i"), array("i")
+        for i in range(len(names)):
+            row = table[i * k:(i + 1) * k]
+            for j, c in enumerate(cols):
+                t = row[c]
+                if t != dead:
+                    edge_sym.append(j)
+                    edge_dst.append(t)
+            row_ptr.append(len(edge_sym))
+        alphabet = frozenset(symbols if alphabet is None else alphabet)
+        symbols = list(symbols)
+        return cls(list(names), symbols, alphabet,
+                   row_ptr, edge_sym, edge_dst, bytearray(map(bool, accept)))
+
+    def row(self, i: int):
+        """(symbol index, [target indices]) for every symbol leaving state i."""
+        es, ed = self.edge_sym, self.edge_dst
+        e, end = self.row_ptr[i], self.row_ptr[i + 1]
+        while e < end:
+            c, group = es[e], []
+            while e < end and es[e] == c:
+                group.append(ed[e])
+                e += 1
+            yield c, group
+
+    def symbol_classes(self) -> tuple[list[int], int]:
+        """Symbols that move every state to the same targets share a class.
+
+        Returns ``(cls, n)``: ``cls[j]`` is the class of ``symbols[j]``
+        (-1 for ε, which never joins a class) and ``n`` the class count.
+        Classes are numbered in order of their first symbol.
+        """
+        if self._classes is None:
+            sigs = [[] for _ in self.symbols]
+            ptr, es, ed = self.row_ptr, self.edge_sym, self.edge_dst
+            for i in range(len(self.names)):
+                for e in range(ptr[i], ptr[i + 1]):
+                    sigs[es[e]].append((i, ed[e]))
+            ids, cls = {}, []
+            for sym, sig in zip(self.symbols, sigs):
+                cls.append(-1 if sym == EPSILON
+                           else ids.setdefault(tuple(sig), len(ids)))
+            self._classes = (cls, len(ids))
+        return self._classes
+
+    def canonical_form(self, start: int) -> tuple:
+        """Renaming-invariant description of the part reachable from
+        ``start`` (a state index, or -1), plus the alphabet.
+
+        States are numbered breadth-first from the start, following symbols
+        in order; with one target per symbol (a DFA) that numbering is
+        already canonical.  Otherwise the targets of one symbol are taken
+        in order of their colour (see _colours).  Each row is written as
+        maximal code-point intervals with equal target numbers, so ``a``,
+        ``b``, ``c`` and ``a-c`` read the same.  Equal forms mean
+        isomorphic automata; only rare colour ties between different states
+        can make two isomorphic automata come out different.
+        """
+        reach, rows, branching = [], {}, False
+        if start >= 0:
+            seen, reach = {start}, [start]
+            for s in reach:
+                rows[s] = list(self.row(s))
+                for _, group in rows[s]:
+                    branching = branching or len(group) > 1
+                    for t in group:
+                        if t not in seen:
+                            seen.add(t)
+                            reach.append(t)
+        color = self._colours(reach, rows) if branching else {}
+
+        num, order = {}, []
+        if reach:
+            num[start], order = 0, [start]
+            for s in order:
+                for _, group in rows[s]:
+                    if len(group) > 1:
+                        group = sorted(group, key=lambda t: (color[t], t))
+                    for t in group:
+                        if t not in num:
+                            num[t] = len(num)
+                            order.append(t)
+
+        def merged(pairs):
+            out = []
+            for label, targets in pairs:
+                sp = label_span(label)
+                if sp and out and len(out[-1]) == 3 and out[-1][2] == targets \
+                        and out[-1][1] + 1 == sp[0]:
+                    out[-1] = (out[-1][0], sp[1], targets)
+                else:
+                    out.append((*sp, targets) if sp else (label, targets))
+            return tuple(out)
+
+        symbols = self.symbols
+        states = tuple(
+            (self.accept[s], merged((symbols[c], tuple(sorted(num[t] for t in g)))
+                                    for c, g in rows[s]))
+            for s in order)
+        alphabet = merged((a, ()) for a in refine(self.alphabet))
+        return alphabet, states
+
+    def _colours(self, reach: list, rows: dict) -> dict:
+        """Coarsest colouring of ``reach`` that splits accepting from other
+        states and in which same-coloured states have equally many moves
+        per symbol class into every colour.
+
+        Worklist refinement over an ordered partition: every cell is a
+        range of ``elems``, a splitter cell splits each cell by the number
+        of moves its states make into the splitter, and the pieces are laid
+        out in order of that number.  A cell that is not waiting already
+        re-queues all its pieces but the largest.  Every choice depends
+        only on positions and counts, never on state indices, so a state's
+        colour (the start of its cell) is the same in any renaming.
+        """
+        col, _ = self.symbol_classes()
+        pred = {s: [] for s in reach}           # t → [(class, p)] per move p → t
+        for p in reach:
+            for c, group in rows[p]:
+                for t in group:
+                    pred[t].append((col[c], p))
+
+        elems = [s for s in reach if not self.accept[s]] + [s for s in reach if self.accept[s]]
+        pos = {s: i for i, s in enumerate(elems)}
+        cut = len(elems) - sum(1 for s in reach if self.accept[s])
+        lo, hi, cell_of, queue = [], [], {}, []
+        for a, b in ((0, cut), (cut, len(elems))):
+            if a < b:
+                cid = len(lo)
+                lo.append(a)
+                hi.append(b)
+                queue.append(cid)
+                for s in elems[a:b]:
+                    cell_of[s] = cid
+        waiting = set(queue)
+
+        def split(cid, marked):
+            a, b = lo[cid], hi[cid]
+            marked.sort()
+            if len(marked) == b - a and marked[0][0] == marked[-1][0]:
+                return
+            for i, (_, s) in enumerate(marked):        # marked states to the front
+                j, other = pos[s], elems[a + i]
+                elems[a + i], elems[j] = s, other
+                pos[s], pos[other] = a + i, j
+            runs, i = [], 0
+            while i < len(marked):
+                j = i
+                while j < len(marked) and marked[j][0] == marked[i][0]:
+                    j += 1
+                runs.append((a + i, a + j))
+                i = j
+            if len(marked) < b - a:
+                runs.append((a + len(marked), b))       # moves-free rest
+            pieces = []
+            for r, (x, y) in enumerate(runs):
+                if r == len(runs) - 1:
+                    new = cid
+                else:
+                    new = len(lo)
+                    lo.append(x)
+                    hi.append(y)
+                    for s in elems[x:y]:
+                        cell_of[s] = new
+                lo[new], hi[new] = x, y
+                pieces.append(new)
+            if cid in waiting:
+                fresh = pieces[:-1]
+            else:
+                largest = max(pieces, key=lambda p: (hi[p] - lo[p], -lo[p]))
+                fresh = [p for p in pieces if p != largest]
+            queue.extend(fresh)
+            waiting.update(fresh)
+
+        head = 0
+        while head < len(queue):
+            sid = queue[head]
+            head += 1
+            waiting.discard(sid)
+            counts = {}
+            for t in elems[lo[sid]:hi[sid]]:
+                for k, p in pred[t]:
+                    counts[k, p] = counts.get((k, p), 0) + 1
+            by_class = {}
+            for (k, p), m in counts.items():
+                by_class.setdefault(k, []).append((m, p))
+            for k in sorted(by_class):
+                cells = {}
+                for m, p in by_class[k]:
+                    cells.setdefault(cell_of[p], []).append((m, p))
+                for cid in sorted(cells, key=lo.__getitem__):
+                    split(cid, cells[cid])
+        return {s: lo[cell_of[s]] for s in reach}
+
+    def nbytes(self) -> int:
+        """Approximate size of the arrays and tables, names excluded."""
+        return (sum(a.itemsize * len(a) for a in (self.row_ptr, self.edge_sym, self.edge_dst))
+                + len(self.accept) + sys.getsizeof(self.index) + sys.getsizeof(self.names))
+
+
+# ── read-only views in the old dict/set shapes ───────────────────────────────
+class AcceptView(Set):
+    __slots__ = ("_g",)
+
+    def __init__(self, graph):
+        self._g = graph
+
+    @classmethod
+    def _from_iterable(cls, it):       # results of &, |, - are plain sets
+        return set(it)
+
+    def __contains__(self, name):
+        i = self._g.index.get(name)
+        return i is not None and bool(self._g.accept[i])
+
+    def __iter__(self):
+        names = self._g.names
+        return (names[i] for i, a in enumerate(self._g.accept) if a)
+
+    def __len__(self):
+        return sum(self._g.accept)
+
+    def __repr__(self):
+        return f"{{{', '.join(map(repr, self))}}}"
+
+
+class RowView(Mapping):
+    """symbol → target name (DFA) or list of target names (NFA)."""
+    __slots__ = ("_g", "_i", "_dfa")
+
+    def __init__(self, graph, i, dfa):
+        self._g, self._i, self._dfa = graph, i, dfa
+
+    def _value(self, group):
+        names = self._g.names
+        if self._dfa and len(group) == 1:
+            return names[group[0]]
+        return [names[t] for t in group]
+
+    def __getitem__(self, sym):
+        c = self._g.sym_index.get(sym)
+        if c is not None:           # an atom of the graph: no merging needed
+            for c2, group in self._g.row(self._i):
+                if c2 == c:
+                    return self._value(group)
+            raise KeyError(sym)
+        for label, value in self.items():
+            if label == sym or (isinstance(label, CharRange)
+                                and isinstance(sym, str) and sym in label):
+                return value
+        raise KeyError(sym)
+
+    def __iter__(self):
+        return (label for label, _ in self.items())
+
+    def __len__(self):
+        return len(self.items())
+
+    def items(self):
+        """(label, targets) pairs; neighbouring character atoms with the
+        same targets are merged back into one range when any is a range."""
+        symbols, out, run = self._g.symbols, [], []
+
+        def flush():
+            if len(run) > 1 and any(isinstance(a, CharRange) for a, _, _ in run):
+                out.append((CharRange(chr(run[0][1][0]), chr(run[-1][1][1])),
+                            self._value(run[0][2])))
+            else:
+                out.extend((a, self._value(group)) for a, _, group in run)
+            run.clear()
+
+        for c, group in self._g.row(self._i):
+            atom = symbols[c]
+            sp = label_span(atom)
+            if sp and run and run[-1][2] == group and run[-1][1][1] + 1 == sp[0]:
+                run.append((atom, sp, group))
+                continue
+            flush()
+            if sp:
+                run.append((atom, sp, group))
+            else:
+                out.append((atom, self._value(group)))
+        flush()
+        return out
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class TransitionsView(Mapping):
+    """state → RowView, listing only states that have outgoing moves."""
+    __slots__ = ("_g", "_dfa")
+
+    def __init__(self, graph, dfa):
+        self._g, self._dfa = graph, dfa
+
+    def __getitem__(self, name):
+        i = self._g.index.get(name)
+        if i is None or self._g.row_ptr[i] == self._g.row_ptr[i + 1]:
+            raise KeyError(name)
+        return RowView(self._g, i, self._dfa)
+
+    def __iter__(self):
+        ptr, names = self._g.row_ptr, self._g.names
+        return (names[i] for i in range(len(names)) if ptr[i] < ptr[i + 1])
+
+    def __len__(self):
+        ptr = self._g.row_ptr
+        return sum(1 for i in range(len(ptr) - 1) if ptr[i] < ptr[i + 1])
+
+    def to_dict(self) -> dict:
+        return {s: dict(row.items()) for s, row in self.items()}
+
+    def __repr__(self):
+        return repr(self.to_dict())
@@ -2,11 +2,13 @@
 # fa_database.py
 #
 # All DB I/O for NFAs / DFAs.
-# Requires db.py (get_connection, make_public_id) and fa_logic.FiniteAutomaton.
+# Requires db.py (session, transaction, make_public_id) and fa_logic.FiniteAutomaton.
+# Loads go through fa_lru's cache; saves and deletes invalidate it.
 # ─────────────────────────────────────────────────────────────────────────────
 from typing import Optional
-from db import get_connection, make_public_id
-from fa_logic import FiniteAutomaton
+from db import make_public_id, session, transaction
+from fa_logic import CharRange, FiniteAutomaton
+from fa_lru import load_cache
 
 
 # ╭──────────────────────────────────────────────────────────────────────────╮
@@ -20,7 +22,12 @@ def init_all_tables() -> None:
             id         INT AUTO_INCREMENT PRIMARY KEY,
             public_id  VARCHAR(64) UNIQUE,
             name       VARCHAR(255) NOT NULL,
-            type       ENUM('NFA','DFA') NOT NULL
+            type       ENUM('NFA','DFA') NOT NULL,
+            fingerprint CHAR(64) NULL,
+            n_states      INT NULL,
+            n_symbols     INT NULL,
+            n_transitions INT NULL,
+            INDEX idx_nfas_fingerprint (fingerprint)
         )
         """,
         """
@@ -39,6 +46,7 @@ def init_all_tables() -> None:
             nfa_id          INT,
             from_state_id   INT,
             symbol          VARCHAR(32),
+            symbol_end      VARCHAR(32) NULL,
             to_state_id     INT,
             FOREIGN KEY (nfa_id) REFERENCES NFAs(id) ON DELETE CASCADE,
             FOREIGN KEY (from_state_id) REFERENCES NFA_States(id),
@@ -68,12 +76,67 @@ def init_all_tables() -> None:
         """,
     ]
 
-    conn = get_connection()
-    cur = conn.cursor()
-    for stmt in ddl:
-        cur.execute(stmt)
-    cur.close()
-    conn.close()
+    with session() as conn:
+        cur = conn.cursor()
+        for stmt in ddl:
+            cur.execute(stmt)
+        _add_missing_columns(cur)
+        _add_missing_indexes(cur)
+        _backfill_counts(cur)
+        cur.close()
+
+
+# columns added after tables may already exist: (table, column, definition)
+LATER_COLUMNS = [
+    ("NFA_Transitions", "symbol_end", "VARCHAR(32) NULL AFTER symbol"),
+    ("NFAs", "fingerprint", "CHAR(64) NULL"),
+    ("NFAs", "n_states", "INT NULL"),
+    ("NFAs", "n_symbols", "INT NULL"),
+    ("NFAs", "n_transitions", "INT NULL"),
+]
+# indexes on those columns: (table, index name, column list)
+LATER_INDEXES = [
+    ("NFAs", "idx_nfas_fingerprint", "fingerprint"),
+]
+
+
+def _add_missing_columns(cur) -> None:
+    for table, column, definition in LATER_COLUMNS:
+        cur.execute(
+            "SELECT COUNT(*) FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+            (table, column),
+        )
+        if not cur.fetchone()[0]:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _add_missing_indexes(cur) -> None:
+    for table, index, columns in LATER_INDEXES:
+        cur.execute(
+            "SELECT COUNT(*) FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+            (table, index),
+        )
+        if not cur.fetchone()[0]:
+            cur.execute(f"CREATE INDEX {index} ON {table} ({columns})")
+
+
+def _backfill_counts(cur) -> None:
+    """Fill the count columns of rows saved before they existed."""
+    cur.execute(
+        "UPDATE NFAs n "
+        "LEFT JOIN (SELECT nfa_id, COUNT(*) AS c FROM NFA_States GROUP BY nfa_id) s "
+        "  ON s.nfa_id = n.id "
+        "LEFT JOIN (SELECT nfa_id, COUNT(*) AS c, "
+        "                  COUNT(DISTINCT CASE WHEN symbol NOT IN ('', 'ε') "
+        "                        THEN CONCAT(symbol, CHAR(0), COALESCE(symbol_end, '')) END) AS k "
+        "           FROM NFA_Transitions GROUP BY nfa_id) t "
+        "  ON t.nfa_id = n.id "
+        "SET n.n_states = COALESCE(s.c, 0), n.n_symbols = COALESCE(t.k, 0), "
+        "    n.n_transitions = COALESCE(t.c, 0) "
+        "WHERE n.n_states IS NULL"
+    )
 
 
 # ╭──────────────────────────────────────────────────────────────────────────╮
@@ -81,147 +144,262 @@ def init_all_tables() -> None:
 # ╰──────────────────────────────────────────────────────────────────────────╯
 def create_automaton(name: str,
                      kind: str = "NFA",
-                     public_id: Optional[str] = None) -> tuple[int, str]:
+                     public_id: Optional[str] = None,
+                     fingerprint: Optional[str] = None) -> tuple[int, str]:
     public_id = public_id or make_public_id(name)
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO NFAs (public_id, name, type) VALUES (%s, %s, %s)",
-        (public_id, name, kind),
-    )
-    pk = cur.lastrowid
-    cur.close()
-    conn.close()
+    with session() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO NFAs (public_id, name, type, fingerprint, "
+            "n_states, n_symbols, n_transitions) VALUES (%s, %s, %s, %s, 0, 0, 0)",
+            (public_id, name, kind, fingerprint),
+        )
+        pk = cur.lastrowid
+        cur.close()
     return pk, public_id
 
 
 def add_state(nfa_id: int, name: str,
               is_start: bool, is_accept: bool) -> int:
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO NFA_States (nfa_id, state, is_start, is_final) "
-        "VALUES (%s, %s, %s, %s)",
-        (nfa_id, name, is_start, is_accept),
-    )
-    pk = cur.lastrowid
-    cur.close()
-    conn.close()
+    """Insert a state and add it to the automaton's n_states; a count still
+    NULL (a row older than the column) stays so for _backfill_counts."""
+    with transaction() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO NFA_States (nfa_id, state, is_start, is_final) "
+            "VALUES (%s, %s, %s, %s)",
+            (nfa_id, name, is_start, is_accept),
+        )
+        pk = cur.lastrowid
+        cur.execute("UPDATE NFAs SET n_states = n_states + 1 WHERE id = %s", (nfa_id,))
+        cur.close()
     return pk
 
 
 def add_transition(nfa_id: int, src_id: int,
-                   sym: str, tgt_id: int) -> None:
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO NFA_Transitions "
-        "(nfa_id, from_state_id, symbol, to_state_id) "
-        "VALUES (%s, %s, %s, %s)",
-        (nfa_id, src_id, sym, tgt_id),
-    )
-    cur.close()
-    conn.close()
+                   sym, tgt_id: int) -> None:
+    """One row per transition; a CharRange label is stored as
+    symbol = first character, symbol_end = last character.  The counts are
+    updated as in add_state; a label not yet used by this automaton (ε
+    aside) adds a symbol."""
+    lo, hi = (sym.lo, sym.hi) if isinstance(sym, CharRange) else (sym, None)
+    with transaction() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE NFAs SET n_transitions = n_transitions + 1, "
+            "n_symbols = n_symbols + (%s AND NOT EXISTS ("
+            "  SELECT 1 FROM NFA_Transitions WHERE nfa_id = %s AND symbol = %s "
+            "  AND COALESCE(symbol_end, '') = %s)) "
+            "WHERE id = %s",
+            (lo not in ("", "ε"), nfa_id, lo, hi or "", nfa_id),
+        )
+        cur.execute(
+            "INSERT INTO NFA_Transitions "
+            "(nfa_id, from_state_id, symbol, symbol_end, to_state_id) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            (nfa_id, src_id, lo, hi, tgt_id),
+        )
+        cur.close()
 
 
 def save_input_test(nfa_id: int, s: str, ok: bool) -> None:
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO NFA_InputTests (nfa_id, input_string, is_accepted) "
-        "VALUES (%s, %s, %s)",
-        (nfa_id, s, ok),
-    )
-    cur.close()
-    conn.close()
+    with session() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO NFA_InputTests (nfa_id, input_string, is_accepted) "
+            "VALUES (%s, %s, %s)",
+            (nfa_id, s, ok),
+        )
+        cur.close()
+
+
+def save_input_tests(nfa_id: int, results) -> None:
+    """Record many (input_string, accepted) pairs with one executemany."""
+    with session() as conn:
+        cur = conn.cursor()
+        cur.executemany(
+            "INSERT INTO NFA_InputTests (nfa_id, input_string, is_accepted) "
+            "VALUES (%s, %s, %s)",
+            [(nfa_id, s, bool(ok)) for s, ok in results],
+        )
+        cur.close()
 
 
 def save_conversion(src_pk: int, dst_pk: int, ctype: str) -> None:
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO NFA_Conversions "
-        "(source_nfa_id, result_dfa_id, conversion_type) "
-        "VALUES (%s, %s, %s)",
-        (src_pk, dst_pk, ctype),
-    )
-    cur.close()
-    conn.close()
+    with session() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO NFA_Conversions "
+            "(source_nfa_id, result_dfa_id, conversion_type) "
+            "VALUES (%s, %s, %s)",
+            (src_pk, dst_pk, ctype),
+        )
+        cur.close()
+
+
+# ╭──────────────────────────────────────────────────────────────────────────╮
+# │  Fingerprint lookups                                                    │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+def find_by_fingerprint(fingerprint: str) -> Optional[tuple[int, str]]:
+    """(pk, public_id) of a stored automaton with this fingerprint."""
+    with session() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT id, public_id FROM NFAs WHERE fingerprint=%s ORDER BY id LIMIT 1",
+            (fingerprint,),
+        )
+        row = cur.fetchone()
+        cur.close()
+    return (row[0], row[1]) if row else None
+
+
+def find_conversion(src_pk: Optional[int], fingerprint: str,
+                    ctype: str) -> Optional[tuple[int, str, int]]:
+    """An earlier ``ctype`` result of this automaton, or of any stored
+    automaton with the same fingerprint, as (result pk, result public_id,
+    source pk)."""
+    with session() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT r.id, r.public_id, s.id FROM NFA_Conversions c "
+            "JOIN NFAs s ON s.id = c.source_nfa_id "
+            "JOIN NFAs r ON r.id = c.result_dfa_id "
+            "WHERE c.conversion_type=%s AND (s.id=%s OR s.fingerprint=%s) "
+            "ORDER BY c.id LIMIT 1",
+            (ctype, src_pk, fingerprint),
+        )
+        row = cur.fetchone()
+        cur.close()
+    return tuple(row) if row else None
 
 
 # ╭──────────────────────────────────────────────────────────────────────────╮
 # │  High‑level save/load helpers                                           │
 # ╰──────────────────────────────────────────────────────────────────────────╯
-def save_automaton_to_db(fa: FiniteAutomaton) -> tuple[int, str]:
-    pk, pubid = create_automaton(
-        fa.name,
-        "DFA" if fa.is_dfa else "NFA",
-        fa.id,
-    )
-    fa.id = pubid
+BULK_CHUNK = 5_000      # rows per executemany batch
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
 
-    # insert states
-    id_map = {
-        s: add_state(pk, s, s == fa.start_state, s in fa.accept_states)
-        for s in fa.states
-    }
 
-    # insert transitions
-    for src, mp in fa.transitions.items():
+def _insert_many(cur, sql: str, rows: list) -> None:
+    for i in range(0, len(rows), BULK_CHUNK):
+        cur.executemany(sql, rows[i:i + BULK_CHUNK])
+
+
+def _counts(fa: FiniteAutomaton) -> tuple[int, int, int]:
+    """(states, symbols used by transitions, transition rows) of ``fa``."""
+    symbols, rows = set(), 0
+    for mp in fa.transitions.values():
         for sym, dsts in mp.items():
-            dst_iter = dsts if isinstance(dsts, (list, set)) else [dsts]
-            for dst in dst_iter:
-                add_transition(pk, id_map[src], sym, id_map[dst])
+            if sym != "ε":
+                symbols.add(sym)
+            rows += len(dsts) if isinstance(dsts, (list, set)) else 1
+    return len(fa.states), len(symbols), rows
 
-    return pk, pubid
 
+def save_automata_to_db(fas) -> list[tuple[int, str]]:
+    """Save every automaton in one transaction: all of them are stored, or
+    (if anything fails) none.  Headers go in one by one for their ids; the
+    states and transitions of all automata go in with executemany.  Returns
+    (pk, public_id) per automaton and sets fa.id / fa.db_id once committed."""
+    fas = list(fas)
+    if not fas:
+        return []
+    keys = []
+    with transaction() as conn:
+        cur = conn.cursor()
 
-def load_automaton_by_id(public_id: str) -> Optional[FiniteAutomaton]:
-    """Return FiniteAutomaton object or None if not found."""
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
+        # headers, with the counts the browser lists
+        for fa in fas:
+            pubid = fa.id or make_public_id(fa.name)
+            cur.execute(
+                "INSERT INTO NFAs (public_id, name, type, fingerprint, "
+                "n_states, n_symbols, n_transitions) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                (pubid, fa.name, "DFA" if fa.is_dfa else "NFA", fa.fingerprint(),
+                 *_counts(fa)),
+            )
+            keys.append((cur.lastrowid, pubid))
 
-    # header
-    cur.execute(
-        "SELECT id, name, type FROM NFAs WHERE public_id=%s",
-        (public_id,),
-    )
-    head = cur.fetchone()
-    if not head:
+        # states, then their ids back by (automaton, name)
+        _insert_many(
+            cur,
+            "INSERT INTO NFA_States (nfa_id, state, is_start, is_final) "
+            "VALUES (%s, %s, %s, %s)",
+            [(pk, s, s == fa.start_state, s in fa.accept_states)
+             for fa, (pk, _) in zip(fas, keys) for s in fa.states],
+        )
+        pks = [pk for pk, _ in keys]
+        cur.execute(
+            "SELECT nfa_id, state, id FROM NFA_States WHERE nfa_id IN (%s)"
+            % _placeholders(pks),
+            pks,
+        )
+        id_map = {(pk, s): sid for pk, s, sid in cur.fetchall()}
+
+        # transitions; a CharRange label is stored as symbol .. symbol_end
+        rows = []
+        for fa, (pk, _) in zip(fas, keys):
+            for src, mp in fa.transitions.items():
+                for sym, dsts in mp.items():
+                    lo, hi = (sym.lo, sym.hi) if isinstance(sym, CharRange) else (sym, None)
+                    dst_iter = dsts if isinstance(dsts, (list, set)) else [dsts]
+                    for dst in dst_iter:
+                        rows.append((pk, id_map[pk, src], lo, hi, id_map[pk, dst]))
+        _insert_many(
+            cur,
+            "INSERT INTO NFA_Transitions "
+            "(nfa_id, from_state_id, symbol, symbol_end, to_state_id) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
         cur.close()
-        conn.close()
-        return None
 
-    nfa_pk = head["id"]
-    name = head["name"]
-    is_dfa = head["type"] == "DFA"
+    cache = load_cache()
+    for fa, (pk, pubid) in zip(fas, keys):
+        fa.id, fa.db_id = pubid, pk
+        cache.invalidate(pubid)
+    return keys
 
-    # states
-    cur.execute(
-        "SELECT * FROM NFA_States WHERE nfa_id=%s",
-        (nfa_pk,),
-    )
+
+def save_automaton_to_db(fa: FiniteAutomaton) -> tuple[int, str]:
+    return save_automata_to_db([fa])[0]
+
+
+def save_or_reuse(fa: FiniteAutomaton) -> tuple[int, str, bool]:
+    """Save ``fa`` unless a structurally identical automaton is stored
+    already; then ``fa`` takes over that row's ids.  Returns (pk,
+    public_id, reused)."""
+    with session():
+        hit = find_by_fingerprint(fa.fingerprint())
+        if hit is None:
+            return (*save_automaton_to_db(fa), False)
+    fa.db_id, fa.id = hit
+    return hit[0], hit[1], True
+
+
+def _build_automaton(head: dict, state_rows, transition_rows) -> FiniteAutomaton:
+    """FiniteAutomaton from its NFAs row and its NFA_States / NFA_Transitions rows."""
+    is_dfa = head["type"] == "DFA"
     states, accept, start, id_to_name = set(), set(), None, {}
-    for row in cur.fetchall():
-        sid = row["id"]
+    for row in state_rows:
         st_name = row["state"]
-        id_to_name[sid] = st_name
+        id_to_name[row["id"]] = st_name
         states.add(st_name)
         if row["is_start"]:
             start = st_name
         if row["is_final"]:
             accept.add(st_name)
 
-    # transitions
-    cur.execute(
-        "SELECT * FROM NFA_Transitions WHERE nfa_id=%s",
-        (nfa_pk,),
-    )
     transitions = {s: {} for s in states}
-    for row in cur.fetchall():
+    for row in transition_rows:
         src = id_to_name[row["from_state_id"]]
         tgt = id_to_name[row["to_state_id"]]
         sym = row["symbol"] or "ε"
+        if row.get("symbol_end"):
+            sym = CharRange(sym, row["symbol_end"])
         transitions[src].setdefault(sym, set()).add(tgt)
 
     # collapse sets to single values for DFA
@@ -232,13 +410,9 @@ def load_automaton_by_id(public_id: str) -> Optional[FiniteAutomaton]:
                 transitions[src][sym] = vals[0] if len(vals) == 1 else vals
 
     alphabet = {sym for mp in transitions.values() for sym in mp if sym != "ε"}
-
-    cur.close()
-    conn.close()
-
     fa = FiniteAutomaton(
-        id=public_id,
-        name=name,
+        id=head["public_id"],
+        name=head["name"],
         states=states,
         alphabet=alphabet,
         transitions=transitions,
@@ -246,5 +420,162 @@ def load_automaton_by_id(public_id: str) -> Optional[FiniteAutomaton]:
         accept_states=accept,
         is_dfa=is_dfa,
     )
-    fa.db_id = nfa_pk
+    fa.db_id = head["id"]
     return fa
+
+
+def load_automata(public_ids=None) -> list[FiniteAutomaton]:
+    """Load many automata, in the order of ``public_ids``; ids not found
+    are skipped.  Those in the load cache come from there, the rest with
+    three queries in all (headers, states, transitions).  With no ids,
+    every stored automaton, newest first, straight from the database."""
+    if public_ids is None:
+        return _fetch_automata(None)
+    public_ids = list(public_ids)
+    cache, found = load_cache(), {}
+    for pubid in dict.fromkeys(public_ids):
+        fa = cache.get(pubid)
+        if fa is not None:
+            found[pubid] = fa
+    missing = [pubid for pubid in dict.fromkeys(public_ids) if pubid not in found]
+    if missing:
+        for fa in _fetch_automata(missing):
+            cache.put(fa)
+            found[fa.id] = fa
+    return [found[pubid] for pubid in public_ids if pubid in found]
+
+
+def _fetch_automata(public_ids) -> list[FiniteAutomaton]:
+    if public_ids is not None and not public_ids:
+        return []
+    with session() as conn:
+        cur = conn.cursor(dictionary=True)
+        if public_ids is None:
+            cur.execute("SELECT id, public_id, name, type FROM NFAs ORDER BY id DESC")
+        else:
+            cur.execute(
+                "SELECT id, public_id, name, type FROM NFAs WHERE public_id IN (%s)"
+                % _placeholders(public_ids),
+                public_ids,
+            )
+        heads = cur.fetchall()
+        if not heads:
+            cur.close()
+            return []
+        pks = [h["id"] for h in heads]
+        states = {pk: [] for pk in pks}
+        transitions = {pk: [] for pk in pks}
+
+        cur.execute(
+            "SELECT id, nfa_id, state, is_start, is_final FROM NFA_States "
+            "WHERE nfa_id IN (%s)" % _placeholders(pks),
+            pks,
+        )
+        for row in cur.fetchall():
+            states[row["nfa_id"]].append(row)
+
+        cur.execute(
+            "SELECT nfa_id, from_state_id, symbol, symbol_end, to_state_id "
+            "FROM NFA_Transitions WHERE nfa_id IN (%s)" % _placeholders(pks),
+            pks,
+        )
+        for row in cur.fetchall():
+            transitions[row["nfa_id"]].append(row)
+        cur.close()
+
+    by_pubid = {h["public_id"]: _build_automaton(h, states[h["id"]], transitions[h["id"]])
+                for h in heads}
+    if public_ids is None:
+        return list(by_pubid.values())
+    return [by_pubid[p] for p in public_ids if p in by_pubid]
+
+
+def stored_keys(public_ids=None) -> list[tuple[str, int, Optional[str]]]:
+    """(public_id, pk, fingerprint) of the given automata, in the order of
+    ``public_ids`` (ids not found are skipped), or of every stored one,
+    oldest first.  Reads the NFAs table only."""
+    if public_ids is not None:
+        public_ids = list(public_ids)
+        if not public_ids:
+            return []
+    with session() as conn:
+        cur = conn.cursor()
+        if public_ids is None:
+            cur.execute("SELECT public_id, id, fingerprint FROM NFAs ORDER BY id")
+        else:
+            cur.execute(
+                "SELECT public_id, id, fingerprint FROM NFAs WHERE public_id IN (%s)"
+                % _placeholders(public_ids),
+                public_ids,
+            )
+        rows = [tuple(row) for row in cur.fetchall()]
+        cur.close()
+    if public_ids is None:
+        return rows
+    by_pubid = {row[0]: row for row in rows}
+    return [by_pubid[p] for p in public_ids if p in by_pubid]
+
+
+def load_automaton_by_id(public_id: str) -> Optional[FiniteAutomaton]:
+    """Return FiniteAutomaton object or None if not found."""
+    found = load_automata([public_id])
+    return found[0] if found else None
+
+
+def delete_automaton(public_id: str) -> bool:
+    """Delete an automaton with its rows, tests and conversion records;
+    False if there was none."""
+    with transaction() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM NFAs WHERE public_id=%s", (public_id,))
+        row = cur.fetchone()
+        if row:
+            pk = row[0]
+            cur.execute(
+                "DELETE FROM NFA_Conversions WHERE source_nfa_id=%s OR result_dfa_id=%s",
+                (pk, pk),
+            )
+            for table in ("NFA_InputTests", "NFA_Transitions", "NFA_States"):
+                cur.execute(f"DELETE FROM {table} WHERE nfa_id=%s", (pk,))
+            cur.execute("DELETE FROM NFAs WHERE id=%s", (pk,))
+        cur.close()
+    load_cache().invalidate(public_id)
+    return bool(row)
+
+
+# ╭──────────────────────────────────────────────────────────────────────────╮
+# │  Listing without loading                                                │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+SUMMARY_PAGE = 100
+
+
+def list_summaries(after: Optional[int] = None,
+                   limit: int = SUMMARY_PAGE,
+                   name: Optional[str] = None) -> tuple[list[dict], Optional[int]]:
+    """One page of automata, newest first, as dicts of db_id, public_id,
+    name, type and the state / symbol / transition counts; no states or
+    transitions are read.  ``after`` is the db_id the previous page ended
+    at, ``name`` a substring filter.  Returns (rows, ``after`` for the next
+    page or None on the last one)."""
+    where, args = [], []
+    if after is not None:
+        where.append("id < %s")
+        args.append(after)
+    if name:
+        where.append("name LIKE %s")
+        args.append("%" + name.replace("\\", "\\\\").replace("%", "\\%")
+                    .replace("_", "\\_") + "%")
+    with session() as conn:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(
+            "SELECT id AS db_id, public_id, name, type, n_states AS states, "
+            "n_symbols AS symbols, n_transitions AS transitions FROM NFAs "
+            + ("WHERE " + " AND ".join(where) + " " if where else "")
+            + "ORDER BY id DESC LIMIT %s",
+            (*args, limit + 1),
+        )
+        rows = cur.fetchall()
+        cur.close()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1]["db_id"]
+    return rows, None
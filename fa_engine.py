@@ -0,0 +1,869 @@
+# fa_engine.py  ── integer-indexed execution engines behind FiniteAutomaton
+#
+# FiniteAutomaton keeps its states and moves in a CompactGraph (fa_compact);
+# the engines here are built from that once (see FiniteAutomaton.compile)
+# and do the per-symbol work on plain ints.
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from functools import total_ordering
+
+try:
+    import numpy as np
+except ImportError:            # batch simulation falls back to a Python loop
+    np = None
+
+DEAD = -1          # sentinel target for "no transition" in every table
+EPSILON = "ε"      # label of spontaneous moves; never a character of the input
+
+
+# ── transition labels: symbols and character ranges ──────────────────────────
+@total_ordering
+class CharRange:
+    """Transition label matching every character from ``lo`` to ``hi``.
+
+    Sorts among plain symbols as if it were the symbol ``lo`` (ties go to
+    the narrower label), so mixed alphabets can still be sorted.
+    """
+    __slots__ = ("lo", "hi")
+
+    def __init__(self, lo: str, hi: str):
+        if len(lo) != 1 or len(hi) != 1 or hi < lo:
+            raise ValueError(f"Bad character range {lo!r}-{hi!r}")
+        self.lo, self.hi = lo, hi
+
+    def _key(self):
+        return (self.lo, self.hi)
+
+    def __eq__(self, other):
+        return isinstance(other, CharRange) and self._key() == other._key()
+
+    def __lt__(self, other):
+        return self._key() < _label_key(other)
+
+    def __hash__(self):
+        return hash(("CharRange", self.lo, self.hi))
+
+    def __contains__(self, ch):
+        return self.lo <= ch <= self.hi
+
+    def __len__(self):
+        return ord(self.hi) - ord(self.lo) + 1
+
+    def __repr__(self):
+        return f"CharRange({self.lo!r}, {self.hi!r})"
+
+    def __str__(self):
+        return f"{self.lo}-{self.hi}"
+
+
+def _label_key(label):
+    return label._key() if isinstance(label, CharRange) else (label, label)
+
+
+def label_span(label):
+    """Code-point interval of a character label, or None for other symbols."""
+    if isinstance(label, CharRange):
+        return ord(label.lo), ord(label.hi)
+    if len(label) == 1 and label != EPSILON:
+        return ord(label), ord(label)
+    return None
+
+
+def split_labels(labels) -> dict:
+    """Cut character labels at each other's boundaries.
+
+    Returns ``{label: [atoms]}``: the atoms are pairwise disjoint single
+    characters or CharRanges, and every label is exactly the union of its
+    own.  Other symbols (multi-character names, ε) are their own atom.
+    """
+    spans = {lab: label_span(lab) for lab in labels}
+    cuts = sorted({c for sp in spans.values() if sp for c in (sp[0], sp[1] + 1)})
+    out = {}
+    for lab, sp in spans.items():
+        if sp is None:
+            out[lab] = [lab]
+            continue
+        parts, i = [], bisect_left(cuts, sp[0])
+        while cuts[i] <= sp[1]:
+            lo, hi = cuts[i], cuts[i + 1] - 1
+            parts.append(chr(lo) if lo == hi else CharRange(chr(lo), chr(hi)))
+            i += 1
+        out[lab] = parts
+    return out
+
+
+def refine(labels, within=None) -> list:
+    """Sorted disjoint atoms covering ``within`` (default: all of
+    ``labels``), cut at every boundary of ``labels``."""
+    labels = set(labels)
+    within = labels if within is None else set(within)
+    parts = split_labels(labels | within)
+    return sorted({a for lab in within for a in parts[lab]})
+
+
+class CharClasses:
+    """Character → symbol class, without a dict hit per character.
+
+    Code points below 256 go through a 256-byte table, so a latin-1 input
+    is mapped in one ``bytes.translate`` call; higher code points are
+    looked up in sorted runs of consecutive code points sharing a class.
+    """
+    UNKNOWN = 255           # byte-table entry of a character outside Σ
+
+    __slots__ = ("byte_table", "starts", "ends", "ids")
+
+    def __init__(self, class_of: dict, n_classes: int):
+        spans = sorted((sp, c) for a, c in class_of.items() if (sp := label_span(a)))
+        self.starts, self.ends, self.ids = [], [], []
+        for (lo, hi), c in spans:
+            if self.ends and self.ends[-1] == lo - 1 and self.ids[-1] == c:
+                self.ends[-1] = hi
+            else:
+                self.starts.append(lo)
+                self.ends.append(hi)
+                self.ids.append(c)
+        self.byte_table = None
+        if n_classes < self.UNKNOWN:
+            table = bytearray([self.UNKNOWN]) * 256
+            for lo, hi, c in self.intervals():
+                if lo < 256:
+                    table[lo:min(hi, 255) + 1] = bytes([c]) * (min(hi, 255) + 1 - lo)
+            self.byte_table = bytes(table)
+
+    def intervals(self):
+        """Maximal ``(lo, hi, class)`` code-point runs."""
+        return zip(self.starts, self.ends, self.ids)
+
+    def lookup(self, ch: str):
+        """Class of one character, or None."""
+        cp = ord(ch)
+        if cp < 256 and self.byte_table is not None:
+            c = self.byte_table[cp]
+            return None if c == self.UNKNOWN else c
+        r = bisect_right(self.starts, cp) - 1
+        return self.ids[r] if r >= 0 and cp <= self.ends[r] else None
+
+    def codes(self, text: str):
+        """Class code of every character, unknown ones included: bytes
+        (unknown = UNKNOWN) when the byte table applies, else a list
+        (unknown = -1).  Either way a code is valid iff ``0 <= c < n``."""
+        if self.byte_table is not None:
+            try:
+                return text.encode("latin-1").translate(self.byte_table)
+            except UnicodeEncodeError:
+                pass
+        lookup = self.lookup
+        return [-1 if (c := lookup(ch)) is None else c for ch in text]
+
+    def encode(self, input_string: str):
+        """Class codes of the whole input, or None if any character is
+        outside the alphabet (such a run is rejected whatever came first)."""
+        if self.byte_table is not None:
+            try:
+                codes = input_string.encode("latin-1").translate(self.byte_table)
+            except UnicodeEncodeError:
+                pass
+            else:
+                return None if self.UNKNOWN in codes else codes
+        codes, lookup = [], self.lookup
+        for ch in input_string:
+            c = lookup(ch)
+            if c is None:
+                return None
+            codes.append(c)
+        return codes
+
+
+def _class_map(symbols, classes, n_classes):
+    """(class_of, n_classes) for symbols mapped to ``classes`` (default:
+    one class per symbol)."""
+    if classes is None:
+        return {sym: i for i, sym in enumerate(symbols)}, len(symbols)
+    return dict(zip(symbols, classes)), n_classes
+
+
+def class_for(engine, label):
+    """Class of a symbol, or of an atom lying inside one of the engine's
+    own atoms (see refine); None if the engine has no move on it."""
+    sp = label_span(label)
+    if sp is None:
+        return engine.class_of.get(label)
+    return engine.chars.lookup(chr(sp[0]))
+
+
+class CompiledDFA:
+    """Dense ``state × symbol-class`` transition table of a DFA.
+
+    Row ``s`` lives at ``table[s * n_classes : (s + 1) * n_classes]``; a
+    ``DEAD`` entry means the input is rejected from there on.  Symbols that
+    behave alike everywhere share a class (see CompactGraph.symbol_classes),
+    so the width is the number of classes, not |Σ|.
+    """
+    __slots__ = ("state_names", "index", "symbols", "class_of", "chars",
+                 "n_classes", "table", "start", "accept", "_np")
+
+    def __init__(self, state_names, symbols, table, start, accept, index=None,
+                 classes=None, n_classes=None):
+        self.state_names = state_names
+        self.index = index if index is not None else {s: i for i, s in enumerate(state_names)}
+        self.symbols = symbols
+        self.class_of, self.n_classes = _class_map(symbols, classes, n_classes)
+        self.chars = CharClasses(self.class_of, self.n_classes)
+        self.table = table
+        self.start = start
+        self.accept = accept
+        self._np = None
+
+    def classes(self) -> list[int]:
+        """Class of every symbol, aligned with ``symbols``."""
+        return [self.class_of[s] for s in self.symbols]
+
+    def step(self, state: int, sym: str) -> int:
+        c = class_for(self, sym)
+        if c is None or state < 0:
+            return DEAD
+        return self.table[state * self.n_classes + c]
+
+    def run(self, input_string: str, state: int | None = None) -> int:
+        """Advance from ``state`` (default: start) and return the end state."""
+        table, k = self.table, self.n_classes
+        st = self.start if state is None else state
+        codes = self.chars.encode(input_string)
+        if st < 0 or codes is None:
+            return DEAD
+        for c in codes:
+            st = table[st * k + c]
+            if st < 0:
+                return DEAD
+        return st
+
+    def accepts(self, input_string: str) -> bool:
+        st = self.run(input_string)
+        return st >= 0 and bool(self.accept[st])
+
+    # ── batch execution ───────────────────────────────────────────────────
+    def _np_tables(self):
+        """(flat table, row width, code-point → class LUT, accept vector).
+
+        The table gets an absorbing dead row ``n`` and an extra column ``k``
+        for characters outside the alphabet, so the batch loop never has to
+        test for DEAD.
+        """
+        if self._np is None:
+            n, k = len(self.state_names), self.n_classes
+            tab = np.full((n + 1, k + 1), n, dtype=np.intp)
+            if n and k:
+                body = np.frombuffer(self.table, dtype=np.intc).reshape(n, k)
+                tab[:n, :k] = np.where(body < 0, n, body)
+            runs = list(self.chars.intervals())
+            # one slot past the largest symbol collects every unknown character
+            lut = np.full(max((hi for _, hi, _ in runs), default=0) + 2, k,
+                          dtype=np.uint8 if k < 255 else np.int32)
+            for lo, hi, c in runs:
+                lut[lo:hi + 1] = c
+            acc = np.zeros(n + 1, dtype=bool)
+            acc[:n] = np.frombuffer(bytes(self.accept), dtype=np.uint8) != 0
+            self._np = (tab.ravel(), k + 1, lut, acc)
+        return self._np
+
+    def accepts_many(self, strings, block: int = 1 << 16, cells: int = 1 << 21,
+                     min_rows: int = 64):
+        """Acceptance of every string, as a NumPy bool array.
+
+        Strings are encoded to class codes in one vectorised pass, sorted by
+        length and cut into blocks; each block is laid out as a padded
+        ``position × string`` array and advanced in lock-step, one table
+        gather per input position.  A block holds at most ``block`` strings
+        and ``cells`` padded positions, and only strings at least half as
+        long as its longest, so padding never more than doubles its size.
+        Blocks of fewer than ``min_rows`` strings (long outliers, small
+        batches) go through ``accepts`` one by one.  Without NumPy this
+        degrades to a list of bools from ``accepts``.
+        """
+        strings = list(strings)
+        if np is None:
+            return [self.accepts(s) for s in strings]
+        out = np.zeros(len(strings), dtype=bool)
+        if not strings:
+            return out
+        flat, width, lut, acc = self._np_tables()
+        start = self.start if self.start >= 0 else len(self.state_names)
+
+        lengths = np.fromiter(map(len, strings), dtype=np.intp, count=len(strings))
+        text = "".join(strings)
+        try:
+            cps = np.frombuffer(text.encode("latin-1"), dtype=np.uint8)
+        except UnicodeEncodeError:
+            cps = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        # trailing entry is the pad code read past the end of short strings
+        codes = np.take(lut, np.minimum(np.append(cps, len(lut)), len(lut) - 1))
+        offsets = np.cumsum(lengths) - lengths
+
+        # longest first, so inside a block the strings still running at
+        # position t are always a prefix of the block
+        order = np.argsort(-lengths, kind="stable")
+        neg = -lengths[order]
+        i = 0
+        while i < len(order):
+            longest = -neg[i]
+            if longest == 0:                # only empty strings left
+                out[order[i:]] = acc[start]
+                break
+            j = min(len(order), i + block, i + max(1, cells // longest),
+                    int(np.searchsorted(neg, -((longest + 1) // 2), side="right")))
+            idx, i = order[i:j], j
+            if len(idx) < min_rows:
+                for s in idx:
+                    out[s] = self.accepts(strings[s])
+                continue
+            lens = lengths[idx]
+            steps = np.arange(lens[0])
+            cols = offsets[idx][None, :] + steps[:, None]
+            cols[steps[:, None] >= lens[None, :]] = len(cps)
+            padded = codes[cols]                               # (pos, string)
+            running = np.searchsorted(-lens, -steps, side="left")
+
+            states = np.full(len(idx), start, dtype=np.intp)
+            for t, m in enumerate(running):
+                states[:m] = flat[states[:m] * width + padded[t, :m]]
+            out[idx] = acc[states]
+        return out
+
+
+def compile_dfa(fa) -> CompiledDFA:
+    g = fa.graph
+    cls, k = g.symbol_classes()
+    if -1 in cls:                   # in a DFA table ε is just one more column
+        cls = [k if c < 0 else c for c in cls]
+        k += 1
+    table = array("i", [DEAD]) * (len(g.names) * k)
+    ptr, es, ed = g.row_ptr, g.edge_sym, g.edge_dst
+    for i in range(len(g.names)):
+        for e in range(ptr[i], ptr[i + 1]):
+            if e > ptr[i] and es[e] == es[e - 1]:
+                raise ValueError(
+                    f"Transition δ({g.names[i]}, {g.symbols[es[e]]}) has several "
+                    "targets; only a DFA can be compiled to a table.")
+            table[i * k + cls[es[e]]] = ed[e]
+    start = g.index.get(fa.start_state, DEAD)
+    return CompiledDFA(g.names, g.symbols, table, start, bytearray(g.accept),
+                       g.index, cls, k)
+
+
+# ── NFA: state sets as int bitmasks ──────────────────────────────────────────
+
+
+def iter_bits(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CompiledNFA:
+    """Bitset NFA: bit ``i`` of a mask is state ``state_names[i]``.
+
+    ``succ[c][i]`` is the ε-closed successor set of state ``i`` on symbol
+    class ``c``, so a step is just an OR over the active bits.  The OR is
+    done a byte of the state mask at a time through memo tables, which
+    turns dense state sets into a handful of dict hits per symbol.
+    """
+    __slots__ = ("state_names", "index", "symbols", "class_of", "chars",
+                 "n_classes", "closure", "succ", "start", "accept", "_chunks")
+
+    def __init__(self, state_names, symbols, closure, succ, start, accept, index=None,
+                 classes=None, n_classes=None):
+        self.state_names = state_names
+        self.index = index if index is not None else {s: i for i, s in enumerate(state_names)}
+        self.symbols = symbols
+        self.class_of, self.n_classes = _class_map(symbols, classes, n_classes)
+        self.chars = CharClasses(self.class_of, self.n_classes)
+        self.closure = closure
+        self.succ = succ
+        self.start = start
+        self.accept = accept
+        nbytes = (len(state_names) + 7) // 8
+        self._chunks = [[{} for _ in range(nbytes)] for _ in range(self.n_classes)]
+
+    def step(self, mask: int, c: int) -> int:
+        succ, chunks = self.succ[c], self._chunks[c]
+        out, j = 0, 0
+        while mask:
+            b = mask & 0xFF
+            if b:
+                memo = chunks[j]
+                m = memo.get(b)
+                if m is None:
+                    m, base = 0, j << 3
+                    for i in iter_bits(b):
+                        m |= succ[base + i]
+                    memo[b] = m
+                out |= m
+            mask >>= 8
+            j += 1
+        return out
+
+    def run(self, input_string: str, mask: int | None = None) -> int:
+        """Advance the state set ``mask`` (default: start) over the input."""
+        step = self.step
+        mask = self.start if mask is None else mask
+        codes = self.chars.encode(input_string)
+        if codes is None:
+            return 0
+        for c in codes:
+            mask = step(mask, c)
+            if not mask:
+                return 0
+        return mask
+
+    def accepts(self, input_string: str) -> bool:
+        return bool(self.run(input_string) & self.accept)
+
+    def classes(self) -> list[int]:
+        return [self.class_of[s] for s in self.symbols]
+
+    def names(self, mask: int) -> list[str]:
+        return [self.state_names[i] for i in iter_bits(mask)]
+
+
+def compile_nfa(fa) -> CompiledNFA:
+    g = fa.graph
+    n = len(g.names)
+    col, k = g.symbol_classes()         # graph symbol index → class (-1 for ε)
+    symbols = [a for a in g.symbols if a != EPSILON]
+
+    eps = [0] * n
+    raw = [[0] * n for _ in range(k)]
+    ptr, es, ed = g.row_ptr, g.edge_sym, g.edge_dst
+    for i in range(n):
+        for e in range(ptr[i], ptr[i + 1]):
+            c = col[es[e]]
+            if c < 0:
+                eps[i] |= 1 << ed[e]
+            else:
+                raw[c][i] |= 1 << ed[e]
+
+    # ε-closure of every state: grow each set until it stops changing
+    closure = [(1 << i) | eps[i] for i in range(n)]
+    for i in range(n):
+        seen, todo = closure[i], closure[i] & ~(1 << i)
+        while todo:
+            nxt = 0
+            for j in iter_bits(todo):
+                nxt |= eps[j]
+            todo = nxt & ~seen
+            seen |= nxt
+        closure[i] = seen
+
+    def close(mask):
+        out = 0
+        for j in iter_bits(mask):
+            out |= closure[j]
+        return out
+
+    succ = [[close(row[i]) for i in range(n)] for row in raw]
+    accept = 0
+    for i, a in enumerate(g.accept):
+        if a:
+            accept |= 1 << i
+    i = g.index.get(fa.start_state)
+    start = closure[i] if i is not None else 0
+    classes = [c for c in col if c >= 0]
+    return CompiledNFA(g.names, symbols, closure, succ, start, accept, g.index,
+                       classes, k)
+
+
+# ── Hopcroft partition refinement ────────────────────────────────────────────
+def hopcroft(n: int, k: int, delta, accepting) -> list[int]:
+    """Coarsest partition of a *complete* DFA compatible with acceptance.
+
+    ``delta[s * k + c]`` is the successor of state ``s`` on class ``c`` and
+    ``accepting[s]`` is truthy for final states.  Returns the block number of
+    every state.  Runs in O(n·k·log n): splitters come from a worklist,
+    preimages from an inverse-transition index, and only the smaller half of
+    a split block is relabelled or queued.
+    """
+    # inverse transitions, CSR per class: sources of t on c are
+    # inv_src[c][inv_off[c][t]:inv_off[c][t + 1]]
+    inv_off, inv_src = [], []
+    for c in range(k):
+        cnt = array("i", [0]) * (n + 1)
+        for s in range(n):
+            cnt[delta[s * k + c] + 1] += 1
+        for t in range(n):
+            cnt[t + 1] += cnt[t]
+        fill, src = array("i", cnt), array("i", [0]) * n
+        for s in range(n):
+            t = delta[s * k + c]
+            src[fill[t]] = s
+            fill[t] += 1
+        inv_off.append(cnt)
+        inv_src.append(src)
+
+    # refinable partition: block b owns elems[first[b]:end[b]], of which the
+    # first marked[b] are marked for the split in progress
+    finals = [s for s in range(n) if accepting[s]]
+    others = [s for s in range(n) if not accepting[s]]
+    elems = array("i", finals + others)
+    loc = array("i", [0]) * n
+    for i, s in enumerate(elems):
+        loc[s] = i
+    first, end, marked = [], [], []
+    blk = array("i", [0]) * n
+    for lo, hi in ((0, len(finals)), (len(finals), n)):
+        if lo < hi:
+            b = len(first)
+            first.append(lo); end.append(hi); marked.append(0)
+            for i in range(lo, hi):
+                blk[elems[i]] = b
+
+    work = deque()
+    if len(first) == 2:
+        small = 0 if end[0] - first[0] <= end[1] - first[1] else 1
+        work.extend((small, c) for c in range(k))
+    queued = set(work)
+
+    while work:
+        splitter = work.popleft()
+        queued.discard(splitter)
+        b, c = splitter
+        off, src = inv_off[c], inv_src[c]
+        touched = []
+        for t in elems[first[b]:end[b]]:     # copy: marking reorders elems
+            for j in range(off[t], off[t + 1]):
+                p = src[j]
+                pb = blk[p]
+                pos = first[pb] + marked[pb]
+                if loc[p] >= pos:            # not marked yet: swap into place
+                    q = elems[pos]
+                    elems[pos], elems[loc[p]] = p, q
+                    loc[q], loc[p] = loc[p], pos
+                    if not marked[pb]:
+                        touched.append(pb)
+                    marked[pb] += 1
+
+        for y in touched:
+            m, lo, hi = marked[y], first[y], end[y]
+            marked[y] = 0
+            if m == hi - lo:
+                continue
+            # the new block z takes the smaller side, y keeps the rest
+            z = len(first)
+            if m <= hi - lo - m:
+                first.append(lo); end.append(lo + m); first[y] = lo + m
+            else:
+                first.append(lo + m); end.append(hi); end[y] = lo + m
+            marked.append(0)
+            for i in range(first[z], end[z]):
+                blk[elems[i]] = z
+            for a in range(k):
+                if (z, a) not in queued:
+                    queued.add((z, a))
+                    work.append((z, a))
+    return list(blk)
+
+
+# ── lazy determinization ─────────────────────────────────────────────────────
+class LazyDFA:
+    """On-the-fly subset construction over a CompiledNFA, RE2 style.
+
+    A DFA state (an NFA state mask) gets a row the first time the input
+    reaches it; ``row[c]`` points straight at the successor row once that
+    move has been computed.  At most ``capacity`` rows are kept: eviction
+    picks a victim with the CLOCK approximation of LRU, marks it dead and
+    clears its moves, and pointers into it are re-resolved the next time
+    they are followed.  If a run keeps building states faster than it
+    consumes input (fewer than ``min_chars_per_state`` symbols per new
+    state once the cache has turned over), it finishes on plain NFA
+    stepping instead.
+    """
+
+    def __init__(self, nfa: CompiledNFA, capacity: int = 4096,
+                 min_chars_per_state: int = 10):
+        self.nfa = nfa
+        self.capacity = max(2, capacity)
+        self.min_chars_per_state = min_chars_per_state
+        k = nfa.n_classes
+        # row layout: k move pointers, then mask, accepting, used bit, alive
+        self._M, self._A, self._U, self._L = k, k + 1, k + 2, k + 3
+        self._dead = [None] * k + [0, False, 1, True]
+        self._dead[:k] = [self._dead] * k
+        self._rows = {}
+        self._ring = []
+        self._hand = 0
+        self.hits = self.misses = self.evictions = self.fallbacks = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _evict(self) -> int:
+        ring, U = self._ring, self._U
+        while True:
+            row = ring[self._hand]
+            if row[U]:
+                row[U] = 0
+                self._hand = (self._hand + 1) % len(ring)
+                continue
+            del self._rows[row[self._M]]
+            row[self._L] = False
+            row[:self._M] = [None] * self._M
+            self.evictions += 1
+            return self._hand
+
+    def row(self, mask: int) -> list:
+        if not mask:
+            return self._dead
+        row = self._rows.get(mask)
+        if row is None:
+            row = [None] * self._M + [mask, bool(mask & self.nfa.accept), 1, True]
+            if len(self._ring) < self.capacity:
+                self._ring.append(row)
+            else:
+                self._ring[self._evict()] = row
+            self._rows[mask] = row
+        return row
+
+    def run(self, input_string: str, mask: int | None = None) -> int:
+        """Advance the NFA state set ``mask`` (default: start) over the input."""
+        nfa, dead = self.nfa, self._dead
+        M, U, L = self._M, self._U, self._L
+        codes = nfa.chars.encode(input_string)
+        if codes is None:
+            return 0
+        row = self.row(nfa.start if mask is None else mask)
+        evicted, built = self.evictions, 0
+        for pos, c in enumerate(codes):
+            nxt = row[c]
+            if nxt is None or not nxt[L]:
+                self.misses += 1
+                nmask = nfa.step(row[M], c)
+                nxt = self.row(nmask)
+                if row[L]:
+                    row[c] = nxt
+                built += 1
+                if (self.evictions - evicted >= self.capacity
+                        and pos < built * self.min_chars_per_state):
+                    # thrashing: the cache no longer pays for itself
+                    self.fallbacks += 1
+                    return nfa.run(input_string[pos + 1:], nmask) if nmask else 0
+            else:
+                self.hits += 1
+            if nxt is dead:
+                return 0
+            row = nxt
+            row[U] = 1
+        return row[M]
+
+    def accepts(self, input_string: str) -> bool:
+        return bool(self.run(input_string) & self.nfa.accept)
+
+
+# ── eager subset construction ────────────────────────────────────────────────
+class SubsetBudgetExceeded(RuntimeError):
+    """Subset construction hit its state or time budget.
+
+    ``stats`` holds how far it got: ``dfa_states`` built, ``pending`` sets
+    still queued, ``nfa_states`` and ``elapsed`` seconds.
+    """
+
+    def __init__(self, reason: str, stats: dict):
+        super().__init__(
+            f"NFA→DFA conversion aborted ({reason}) after "
+            f"{stats['dfa_states']} DFA states, {stats['pending']} pending.")
+        self.stats = stats
+
+
+def subset_construction(nfa: CompiledNFA, max_states: int | None = None,
+                        time_budget: float | None = None):
+    """Reachable DFA over ``nfa`` as (masks, table) with interned set ids.
+
+    ``masks[i]`` is the NFA state set of DFA state ``i`` (0 is the start);
+    ``table`` is a dense ``n × n_classes`` array('i') with DEAD for empty
+    successor sets.  Raises SubsetBudgetExceeded once more than
+    ``max_states`` sets exist or ``time_budget`` seconds have passed.
+    """
+    k, step = nfa.n_classes, nfa.step
+    t0 = time.perf_counter()
+    ids = {nfa.start: 0}
+    masks = [nfa.start]
+    table = array("i")
+    i = 0
+    while i < len(masks):
+        if time_budget is not None and not i & 0xFF \
+                and time.perf_counter() - t0 > time_budget:
+            reason = f"time budget {time_budget}s"
+        elif max_states is not None and len(masks) > max_states:
+            reason = f"max_states={max_states}"
+        else:
+            reason = None
+        if reason:
+            raise SubsetBudgetExceeded(reason, {
+                "dfa_states": i, "pending": len(masks) - i,
+                "nfa_states": len(nfa.state_names),
+                "elapsed": time.perf_counter() - t0})
+        mask = masks[i]
+        for c in range(k):
+            nxt = step(mask, c) if mask else 0
+            if not nxt:
+                table.append(DEAD)
+                continue
+            j = ids.get(nxt)
+            if j is None:
+                j = ids[nxt] = len(masks)
+                masks.append(nxt)
+            table.append(j)
+        i += 1
+    return masks, table
+
+
+# ── product construction ─────────────────────────────────────────────────────
+def product_table(a: CompiledDFA, b: CompiledDFA, symbols, accept):
+    """Reachable part of the product of two DFAs over ``symbols``.
+
+    Missing moves are completed with a sink (index ``n``) on each side, and
+    a pair is encoded as ``x * (n_b + 1) + y``.  Returns ``(pairs, table,
+    accepting)``: the decoded ``(x, y)`` of every product state (0 is the
+    start), a dense ``len(pairs) × len(symbols)`` table, and the flags from
+    ``accept(a_accepts, b_accepts)``.  The sink/sink pair is never
+    materialised; moves into it are DEAD.  Character ranges in ``symbols``
+    must not straddle an atom of either side (see refine).
+    """
+    na, nb = len(a.state_names), len(b.state_names)
+    ka, kb = a.n_classes, b.n_classes
+    # moves are computed once per distinct pair of classes, then spread
+    # over the symbols sharing it
+    pairs, spread = {}, []
+    for s in symbols:
+        spread.append(pairs.setdefault((class_for(a, s), class_for(b, s)), len(pairs)))
+    width = nb + 1
+    sink = na * width + nb
+
+    def side(dfa, n, k, x, c):
+        if x == n or c is None:
+            return n
+        t = dfa.table[x * k + c]
+        return n if t < 0 else t
+
+    start = (a.start if a.start >= 0 else na) * width + \
+            (b.start if b.start >= 0 else nb)
+    ids, codes, table = {start: 0}, [start], array("i")
+    i = 0
+    while i < len(codes):
+        x, y = divmod(codes[i], width)
+        row = []
+        for ca, cb in pairs:
+            code = side(a, na, ka, x, ca) * width + side(b, nb, kb, y, cb)
+            if code == sink:
+                row.append(DEAD)
+                continue
+            j = ids.get(code)
+            if j is None:
+                j = ids[code] = len(codes)
+                codes.append(code)
+            row.append(j)
+        table.extend(row[p] for p in spread)
+        i += 1
+
+    pairs = [divmod(c, width) for c in codes]
+    accepting = [bool(accept(x < na and a.accept[x], y < nb and b.accept[y]))
+                 for x, y in pairs]
+    return pairs, table, accepting
+
+
+# ── language equivalence / inclusion ─────────────────────────────────────────
+def _word(queue, i) -> str:
+    out = []
+    while queue[i][2] >= 0:
+        out.append(queue[i][3])
+        i = queue[i][2]
+    return "".join(reversed(out))
+
+
+def _class_pairs(x, y, within=None):
+    """One ``(symbol, x class, y class)`` per distinct pair of classes:
+    symbols in the same pair lead both sides to the same places.  Ranges
+    are cut into atoms first and stand for their first character."""
+    seen = {}
+    for s in refine(set(x.symbols) | set(y.symbols), within):
+        seen.setdefault((class_for(x, s), class_for(y, s)),
+                        s.lo if isinstance(s, CharRange) else s)
+    return [(s, a, b) for (a, b), s in seen.items()]
+
+
+def hk_equivalent(x: CompiledNFA, y: CompiledNFA):
+    """Hopcroft–Karp on the (lazily determinized) automata.
+
+    Pairs of DFA states are unioned in a union-find forest and explored
+    breadth-first; a pair already in one class is skipped, so the work is
+    near-linear in the number of DFA states actually reached.  Returns
+    ``(True, None)`` or ``(False, w)`` with ``w`` a shortest word accepted
+    by exactly one side.
+    """
+    cols = _class_pairs(x, y)
+    parent = {}
+
+    def find(key):
+        root = key
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while key != root:
+            key, parent[key] = parent[key], root
+        return root
+
+    parent[(0, x.start)] = (1, y.start)
+    queue = [(x.start, y.start, -1, None)]
+    i = 0
+    while i < len(queue):
+        p, q = queue[i][0], queue[i][1]
+        if bool(p & x.accept) != bool(q & y.accept):
+            return False, _word(queue, i)
+        for sym, a, b in cols:
+            p2 = x.step(p, a) if p and a is not None else 0
+            q2 = y.step(q, b) if q and b is not None else 0
+            r1, r2 = find((0, p2)), find((1, q2))
+            if r1 != r2:
+                parent[r1] = r2
+                queue.append((p2, q2, i, sym))
+        i += 1
+    return True, None
+
+
+def antichain_included(x: CompiledNFA, y: CompiledNFA):
+    """Is L(x) ⊆ L(y)?  Antichain search over pairs (x state, y state set).
+
+    A pair (p, S) is dropped when some (p, T) with T ⊆ S has been seen,
+    since anything (p, S) could reject (p, T) rejects too; y is never
+    determinized beyond the sets this search touches.  Returns
+    ``(True, None)`` or ``(False, w)`` with ``w`` a shortest word in
+    L(x) \\ L(y).
+    """
+    cols = _class_pairs(x, y, x.symbols)
+    kept = {}
+    queue = []
+
+    def add(p, s, parent, sym):
+        chain = kept.setdefault(p, [])
+        for t in chain:
+            if not t & ~s:
+                return
+        chain[:] = [t for t in chain if s & ~t]
+        chain.append(s)
+        queue.append((p, s, parent, sym))
+
+    for p in iter_bits(x.start):
+        add(p, y.start, -1, None)
+    i = 0
+    while i < len(queue):
+        p, s = queue[i][0], queue[i][1]
+        if x.accept >> p & 1 and not s & y.accept:
+            return False, _word(queue, i)
+        for sym, a, b in cols:
+            succ = x.succ[a][p]
+            if succ:
+                s2 = y.step(s, b) if s and b is not None else 0
+                for p2 in iter_bits(succ):
+                    add(p2, s2, i, sym)
+        i += 1
+    return True, None
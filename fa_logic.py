@@ -1,169 +1,433 @@
+import hashlib
+import uuid
 from typing import Set, Dict, List
-from collections import defaultdict, deque
+from array import array
+from collections import deque
+from fa_engine import (DEAD, EPSILON, CharRange, CompiledDFA, CompiledNFA,
+                       LazyDFA, SubsetBudgetExceeded, antichain_included,
+                       class_for, compile_dfa, compile_nfa, hk_equivalent,
+                       hopcroft, product_table, refine, subset_construction)
+from fa_binary import dumps, loads
+from fa_compact import AcceptView, CompactGraph, TransitionsView
+from fa_parallel import simulate_parallel
+from fa_reduce import reduce_graph
+from fa_search import Searcher, finditer
+from fa_stream import StreamMatcher
+
+def derived_id(*parts) -> str:
+    """Public id for a derived automaton: the operands' ids and the
+    operation, cut short, plus a random suffix, so it fits VARCHAR(64) and
+    never repeats for another result of the same operands."""
+    stem = "_".join(str(p) for p in parts if p)[:40]
+    return f"{stem}_{uuid.uuid4().hex[:16]}"
+
+
+def _readable(names: list[str], prefix: str) -> list[str]:
+    """``names`` if they are all distinct, else ``prefix0..prefixN``."""
+    if len(set(names)) < len(names):
+        return [f"{prefix}{i}" for i in range(len(names))]
+    return names
+
 
 class FiniteAutomaton:
+    LAZY_DFA_CAPACITY = 4096      # cached DFA states for the "lazy" strategy
+
+    # op → (symbol used in result names, acceptance of a pair)
+    PRODUCT_OPS = {
+        "intersection":         ("∩", lambda x, y: x and y),
+        "union":                ("∪", lambda x, y: x or y),
+        "difference":           ("∖", lambda x, y: x and not y),
+        "symmetric_difference": ("△", lambda x, y: x != y),
+    }
+
+    # states, alphabet, transitions and accept states all live in one
+    # CompactGraph; the attributes of those names are read-only views of it,
+    # and assigning one rebuilds the graph
+    __slots__ = ("id", "name", "start_state", "is_dfa", "db_id",
+                 "graph", "_engines")
+
+    # attributes the compiled engines are derived from; assigning any of them
+    # drops the cached engines
+    _STRUCTURAL = frozenset({"states", "alphabet", "transitions",
+                             "start_state", "accept_states", "is_dfa"})
+
     def __init__(self, id: str, name: str, states: Set[str], alphabet: Set[str], transitions: Dict[str, Dict[str, str | List[str]]], start_state: str, accept_states: Set[str], is_dfa: bool = True):
         self.id = id
         self.name = name
-        self.states = set(states)
-        self.alphabet = set(alphabet)
-        self.transitions = transitions
+        self.graph = CompactGraph.from_dicts(states, alphabet, transitions, accept_states)
         self.start_state = start_state
-        self.accept_states = set(accept_states)
         self.is_dfa = is_dfa
 
+    @classmethod
+    def from_table(cls, id: str, name: str, names: List[str], symbols: List[str],
+                   table, start: int, accept, alphabet=None,
+                   cols=None) -> "FiniteAutomaton":
+        """DFA straight from a dense table with one row per name; symbol j
+        reads column ``cols[j]`` (default j), e.g. its symbol class."""
+        fa = cls.__new__(cls)
+        fa.id, fa.name, fa.is_dfa = id, name, True
+        fa.graph = CompactGraph.from_table(names, symbols, table, accept, alphabet,
+                                           DEAD, cols)
+        fa.start_state = fa.graph.names[start] if start != DEAD else None
+        return fa
+
+    @classmethod
+    def from_buffer(cls, buf) -> "FiniteAutomaton":
+        """Automaton of a to_bytes() record held in bytes, a memoryview or an
+        mmap; the transition arrays stay views into ``buf``, uncopied."""
+        fa = cls.__new__(cls)
+        fa.id, fa.name, start_state, is_dfa, fa.graph = loads(buf)
+        fa.start_state, fa.is_dfa = start_state, is_dfa
+        return fa
+
+    def to_bytes(self) -> bytes:
+        """Versioned binary record of this automaton (see fa_binary)."""
+        return dumps(self.id, self.name, self.start_state, self.is_dfa, self.graph)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in self._STRUCTURAL or name == "graph":
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        object.__setattr__(self, "_engines", {})
+
+    # ── dict/set views of the graph ───────────────────────────────────────
+    def _rebuild(self, **parts) -> None:
+        cur = dict(states=self.states, alphabet=self.alphabet,
+                   transitions=self.transitions, accept_states=self.accept_states)
+        cur.update(parts)
+        self.graph = CompactGraph.from_dicts(**cur)
+
+    @property
+    def states(self):
+        return self.graph.index.keys()
+
+    @states.setter
+    def states(self, value):
+        self._rebuild(states=value)
+
+    @property
+    def alphabet(self) -> frozenset:
+        return self.graph.alphabet
+
+    @alphabet.setter
+    def alphabet(self, value):
+        self._rebuild(alphabet=value)
+
+    @property
+    def transitions(self) -> TransitionsView:
+        return TransitionsView(self.graph, self.is_dfa)
+
+    @transitions.setter
+    def transitions(self, value):
+        self._rebuild(transitions=value)
+
+    @property
+    def accept_states(self) -> AcceptView:
+        return AcceptView(self.graph)
+
+    @accept_states.setter
+    def accept_states(self, value):
+        self._rebuild(accept_states=value)
+
+    def symbol_classes(self) -> list[frozenset]:
+        """Groups of symbols that every state treats the same way."""
+        cls, n = self.graph.symbol_classes()
+        groups = [set() for _ in range(n)]
+        for sym, c in zip(self.graph.symbols, cls):
+            if c >= 0:
+                groups[c].add(sym)
+        return [frozenset(g) for g in groups]
+
+    def fingerprint(self) -> str:
+        """SHA-256 of the canonical form: equal for automata that differ
+        only in state names (and label spelling, e.g. ``a-c`` vs a, b, c)."""
+        fp = self._engines.get("fingerprint")
+        if fp is None:
+            form = self.graph.canonical_form(self.graph.index.get(self.start_state, DEAD))
+            raw = repr((bool(self.is_dfa), form)).encode("utf-8", "surrogatepass")
+            fp = self._engines["fingerprint"] = hashlib.sha256(raw).hexdigest()
+        return fp
+
+    def compile(self) -> CompiledDFA:
+        """Integer transition table for the DFA, built once and cached."""
+        eng = self._engines.get("dfa")
+        if eng is None:
+            if not self.is_dfa:
+                raise ValueError("Only a DFA can be compiled; convert it first.")
+            eng = self._engines["dfa"] = compile_dfa(self)
+        return eng
+
+    def compile_nfa(self) -> CompiledNFA:
+        """Bitset engine with precomputed ε-closures (works for DFAs too)."""
+        eng = self._engines.get("nfa")
+        if eng is None:
+            eng = self._engines["nfa"] = compile_nfa(self)
+        return eng
+
+    def lazy_dfa(self) -> LazyDFA:
+        """Determinize-as-you-go cache over compile_nfa(), kept between runs."""
+        eng = self._engines.get("lazy")
+        if eng is None:
+            eng = self._engines["lazy"] = LazyDFA(self.compile_nfa(),
+                                                  self.LAZY_DFA_CAPACITY)
+        return eng
+
+    def matcher(self, encoding: str = "utf-8") -> StreamMatcher:
+        """Incremental matcher: feed(chunk) repeatedly, then result()."""
+        return StreamMatcher(self, encoding)
+
+    def searcher(self) -> Searcher:
+        """Substring scanner over this language, kept between searches."""
+        eng = self._engines.get("search")
+        if eng is None:
+            eng = self._engines["search"] = Searcher(self)
+        return eng
+
+    def finditer(self, text, encoding: str = "latin-1"):
+        """Yield (start, end) of every leftmost-longest, non-overlapping match."""
+        return finditer(self, text, encoding)
+
     def to_dict(self):
         return {
             "id": self.id,
             "name": self.name,
             "states": list(self.states),
             "alphabet": list(self.alphabet),
-            "transitions": self.transitions,
+            "transitions": self.transitions.to_dict(),
             "start_state": self.start_state,
             "accept_states": list(self.accept_states),
             "is_dfa": self.is_dfa
         }
 
     def is_dfa_check(self):
-        for state in self.transitions:
-            for symbol in self.transitions[state]:
-                if not isinstance(self.transitions[state][symbol], str):
+        # deterministic iff no ε-moves and no symbol leads to two targets
+        g = self.graph
+        eps = g.sym_index.get(EPSILON)
+        for i in range(len(g.names)):
+            for c, group in g.row(i):
+                if c == eps or len(group) != 1:
                     return False
         return True
 
-    def simulate(self, input_string: str) -> bool:
+    def simulate(self, input_string: str, strategy: str = "auto") -> bool:
+        """Run the input; ``strategy`` picks the engine.
+
+        "table" (DFA only) walks the compiled transition table, "nfa" steps
+        the bitset NFA, "lazy" builds DFA states on demand over the NFA,
+        "parallel" (DFA only) splits a long input over a process pool.
+        "auto" uses "table" for a DFA and "lazy" otherwise.
+        """
+        if strategy == "auto":
+            strategy = "table" if self.is_dfa else "lazy"
+        if strategy == "table":
+            return self.compile().accepts(input_string)
+        if strategy == "nfa":
+            return self.compile_nfa().accepts(input_string)
+        if strategy == "lazy":
+            return self.lazy_dfa().accepts(input_string)
+        if strategy == "parallel":
+            return simulate_parallel(self, input_string)
+        raise ValueError(f"Unknown simulation strategy: {strategy}")
+
+    def simulate_many(self, input_strings):
+        """Acceptance of many strings at once (NumPy bool array for a DFA)."""
         if self.is_dfa:
-            state = self.start_state
-            for sym in input_string:
-                if sym in self.transitions.get(state, {}):
-                    state = self.transitions[state][sym]
-                else:
-                    return False
-            return state in self.accept_states
-        else:
-            current_states = {self.start_state}
-            for sym in input_string:
-                next_states = set()
-                for state in current_states:
-                    next_states.update(self.transitions.get(state, {}).get(sym, []))
-                current_states = next_states
-                if not current_states:
-                    return False
-            return bool(current_states & self.accept_states)
+            return self.compile().accepts_many(input_strings)
+        return [self.simulate(s) for s in input_strings]
+
+    def reduce(self) -> tuple["FiniteAutomaton", dict]:
+        """Smaller ε-free NFA for the same language, trimmed and quotiented by
+        forward and backward simulation, plus counts of what was removed."""
+        g, start, stats = reduce_graph(self.graph, self.graph.index.get(self.start_state, DEAD))
+        fa = FiniteAutomaton.__new__(FiniteAutomaton)
+        fa.id, fa.name, fa.graph = self.id, self.name, g
+        fa.start_state = g.names[start] if start != DEAD else None
+        fa.is_dfa = False
+        fa.is_dfa = bool(self.is_dfa) and fa.is_dfa_check()
+        return fa, stats
 
-    def convert_to_dfa(self):
+    def convert_to_dfa(self, max_states: int | None = None,
+                       time_budget: float | None = None, reduce: bool = False):
+        """Subset construction; raises SubsetBudgetExceeded past the budget.
+        With ``reduce`` the NFA is shrunk by reduce() first."""
         if self.is_dfa:
             return self
-        new_states = set()
-        new_trans = {}
-        queue = deque()
-        start = frozenset([self.start_state])
-        queue.append(start)
-        visited = set()
+        if reduce:
+            return self.reduce()[0].convert_to_dfa(max_states, time_budget)
+        nfa = self.compile_nfa()
+        masks, table = subset_construction(nfa, max_states, time_budget)
 
-        while queue:
-            curr = queue.popleft()
-            curr_name = ','.join(sorted(curr))
-            if curr_name in visited:
-                continue
-            visited.add(curr_name)
-            new_states.add(curr_name)
-            new_trans[curr_name] = {}
-            for sym in self.alphabet:
-                dest = set()
-                for sub in curr:
-                    dest.update(self.transitions.get(sub, {}).get(sym, []))
-                if dest:
-                    dest_name = ','.join(sorted(dest))
-                    new_trans[curr_name][sym] = dest_name
-                    if dest_name not in visited:
-                        queue.append(frozenset(dest))
-            if not new_trans[curr_name]:
-                new_trans.pop(curr_name)
-
-        new_accepts = {s for s in new_states if set(s.split(',')) & self.accept_states}
-        return FiniteAutomaton(
-            id=f"{self.id}_dfa",
+        # readable names only now: the sorted member states, comma-joined,
+        # unless a state name with a comma makes two of them collide
+        names = _readable([",".join(nfa.names(m)) if m else "∅" for m in masks], "D")
+        return FiniteAutomaton.from_table(
+            id=derived_id(self.id, "dfa"),
             name=f"{self.name}_DFA",
-            states=new_states,
-            alphabet=self.alphabet,
-            transitions=new_trans,
-            start_state=','.join(sorted(start)),
-            accept_states=new_accepts,
-            is_dfa=True
+            names=names,
+            symbols=nfa.symbols,
+            table=table,
+            start=0,
+            accept=[m & nfa.accept for m in masks],
+            alphabet=self.alphabet - {EPSILON},
+            cols=nfa.classes(),
         )
 
     def minimize(self):
         if not self.is_dfa:
             raise ValueError("Minimization requires a DFA.")
-        
+        dfa = self.compile()
+        k, table = dfa.n_classes, dfa.table
+
         # Step 1: Remove unreachable states
-        reachable = {self.start_state}
-        queue = deque([self.start_state])
+        reach = []
+        if dfa.start != DEAD:
+            seen = {dfa.start}
+            queue = deque([dfa.start])
+            while queue:
+                s = queue.popleft()
+                reach.append(s)
+                for t in table[s * k:(s + 1) * k]:
+                    if t != DEAD and t not in seen:
+                        seen.add(t)
+                        queue.append(t)
+
+        # Step 2: Hopcroft refinement on the reachable part, completed with an
+        # explicit trap state (the last index) standing in for missing moves
+        local = {s: i for i, s in enumerate(reach)}
+        trap = len(reach)
+        delta = array("i", [trap]) * ((trap + 1) * k)
+        for s, i in local.items():
+            for c, t in enumerate(table[s * k:(s + 1) * k]):
+                if t != DEAD:
+                    delta[i * k + c] = local[t]
+        accepting = [dfa.accept[s] for s in reach] + [0]
+        blk = hopcroft(trap + 1, k, delta, accepting)
+
+        # Step 3: Build minimized DFA, q0..qn in BFS order from the start.
+        # Moves into the trap's block (the trap and every state that can
+        # no longer reach acceptance) stay undefined, as in the input.
+        dead = blk[trap]
+        rep = {}
+        for i in range(trap):
+            rep.setdefault(blk[i], i)
+        order = {blk[0]: 0} if reach else {}      # block → new state number
+        queue = deque(order)
         while queue:
-            state = queue.popleft()
-            for symbol in self.alphabet:
-                next_state = self.transitions.get(state, {}).get(symbol)
-                if next_state and next_state not in reachable:
-                    reachable.add(next_state)
-                    queue.append(next_state)
-        states = reachable
-        transitions = {s: {a: t for a, t in self.transitions[s].items() if t in reachable} for s in states if s in self.transitions}
-        accept_states = self.accept_states & states
-
-        # Step 2: Partition states into accepting and non-accepting
-        partitions = [accept_states, states - accept_states]
-        partitions = [p for p in partitions if p]
-        new_partitions = []
-
-        # Step 3: Refine partitions
-        while True:
-            for partition in partitions:
-                split = defaultdict(set)
-                for state in partition:
-                    key = tuple(
-                        sorted([
-                            next(iter([p for p in partitions if self.transitions.get(state, {}).get(symbol, "trap") in p]), ["trap"])[0]
-                            for symbol in self.alphabet
-                        ])
-                    )
-                    split[key].add(state)
-                new_partitions.extend(split.values())
-            if len(new_partitions) == len(partitions):
-                break
-            partitions = new_partitions
-            new_partitions = []
-
-        # Step 4: Build minimized DFA
-        state_map = {frozenset(p): f"q{i}" for i, p in enumerate(partitions)}
-        new_states = set(state_map.values())
-        new_transitions = {}
-        new_accept_states = set()
-        new_start_state = None
-
-        for partition in partitions:
-            rep_state = next(iter(partition))
-            new_state = state_map[frozenset(partition)]
-            if rep_state == self.start_state:
-                new_start_state = new_state
-            if rep_state in self.accept_states:
-                new_accept_states.add(new_state)
-            new_transitions[new_state] = {}
-            for symbol in self.alphabet:
-                next_state = self.transitions.get(rep_state, {}).get(symbol)
-                if next_state:
-                    for p in partitions:
-                        if next_state in p:
-                            new_transitions[new_state][symbol] = state_map[frozenset(p)]
-                            break
-
-        return FiniteAutomaton(
-            id=f"{self.id}_min",
+            b = queue.popleft()
+            for t in delta[rep[b] * k:(rep[b] + 1) * k]:
+                if blk[t] != dead and blk[t] not in order:
+                    order[blk[t]] = len(order)
+                    queue.append(blk[t])
+
+        new_table = array("i", [DEAD]) * (max(1, len(order)) * k)
+        for b, i in order.items():
+            for c, t in enumerate(delta[rep[b] * k:(rep[b] + 1) * k]):
+                if blk[t] != dead:
+                    new_table[i * k + c] = order[blk[t]]
+        return FiniteAutomaton.from_table(
+            id=derived_id(self.id, "min"),
             name=f"{self.name}_Minimized",
-            states=new_states,
+            names=[f"q{i}" for i in range(max(1, len(order)))],
+            symbols=dfa.symbols,
+            table=new_table,
+            start=0,
+            accept=[accepting[rep[b]] for b in order] or [0],
             alphabet=self.alphabet,
-            transitions=new_transitions,
-            start_state=new_start_state,
-            accept_states=new_accept_states,
-            is_dfa=True
-        )
\ No newline at end of file
+            cols=dfa.classes(),
+        )
+
+    # ── language operations ───────────────────────────────────────────────
+    def product(self, other: "FiniteAutomaton", op: str,
+                minimize: bool = False) -> "FiniteAutomaton":
+        """Product DFA for one of PRODUCT_OPS over the union of alphabets.
+
+        Only pairs reachable from the start pair are built.  With
+        ``minimize`` both operands are minimized first, which keeps the
+        product small, and the result is minimized too.
+        """
+        if op not in self.PRODUCT_OPS:
+            raise ValueError(f"Unknown product operation: {op}")
+        sign, accept = self.PRODUCT_OPS[op]
+        a, b = self.convert_to_dfa(), other.convert_to_dfa()
+        if minimize:
+            a, b = a.minimize(), b.minimize()
+        da, db = a.compile(), b.compile()
+        # everything either side can read, cut into atoms of both
+        symbols = refine(set(da.symbols) | set(db.symbols) | a.alphabet | b.alphabet)
+        symbols = [s for s in symbols if s != EPSILON]
+        pairs, table, accepting = product_table(da, db, symbols, accept)
+
+        def part(dfa, x):
+            return dfa.state_names[x] if x < len(dfa.state_names) else "∅"
+        names = _readable([f"({part(da, x)},{part(db, y)})" for x, y in pairs], "P")
+        result = FiniteAutomaton.from_table(
+            id=derived_id(self.id, op, other.id),
+            name=f"{self.name}{sign}{other.name}",
+            names=names,
+            symbols=symbols,
+            table=table,
+            start=0,
+            accept=accepting,
+            alphabet=(a.alphabet | b.alphabet) - {EPSILON},
+        )
+        return result._minimized_in_place_of_self() if minimize else result
+
+    def intersection(self, other, minimize: bool = False):
+        return self.product(other, "intersection", minimize)
+
+    def union(self, other, minimize: bool = False):
+        return self.product(other, "union", minimize)
+
+    def difference(self, other, minimize: bool = False):
+        return self.product(other, "difference", minimize)
+
+    def symmetric_difference(self, other, minimize: bool = False):
+        return self.product(other, "symmetric_difference", minimize)
+
+    def complement(self, alphabet: Set[str] | None = None,
+                   minimize: bool = False) -> "FiniteAutomaton":
+        """DFA for Σ* minus this language, Σ being ``alphabet`` or our own.
+
+        The automaton is completed first: missing moves go to an explicit
+        (accepting) trap state "∅".
+        """
+        a = self.convert_to_dfa()
+        dfa = a.compile()
+        sigma = set(alphabet or a.alphabet) - {EPSILON}
+        symbols = refine(set(dfa.symbols) | sigma, sigma)
+        n = len(dfa.state_names)
+        names = _readable(dfa.state_names + ["∅"], "C")
+        cols = [class_for(dfa, s) for s in symbols]
+        table = array("i")
+        for x in range(n + 1):
+            for c in cols:
+                t = dfa.table[x * dfa.n_classes + c] if x < n and c is not None else DEAD
+                table.append(n if t == DEAD else t)
+        result = FiniteAutomaton.from_table(
+            id=derived_id(self.id, "complement"),
+            name=f"¬{self.name}",
+            names=names,
+            symbols=symbols,
+            table=table,
+            start=dfa.start if dfa.start != DEAD else n,
+            accept=[x == n or not dfa.accept[x] for x in range(n + 1)],
+            alphabet=sigma,
+        )
+        return result._minimized_in_place_of_self() if minimize else result
+
+    def _minimized_in_place_of_self(self) -> "FiniteAutomaton":
+        m = self.minimize()
+        m.id, m.name = self.id, self.name
+        return m
+
+
+def equivalent(a: FiniteAutomaton, b: FiniteAutomaton) -> tuple[bool, str | None]:
+    """Same language?  ``(False, w)`` carries a shortest word telling them apart."""
+    return hk_equivalent(a.compile_nfa(), b.compile_nfa())
+
+
+def includes(a: FiniteAutomaton, b: FiniteAutomaton) -> tuple[bool, str | None]:
+    """L(a) ⊆ L(b)?  ``(False, w)`` carries a shortest word in L(a) but not L(b)."""
+    return antichain_included(a.compile_nfa(), b.compile_nfa())
@@ -0,0 +1,86 @@
+# fa_lru.py  ── in-process LRU of automata loaded from the database
+#
+# Stored automata do not change after they are saved, so a public_id maps to
+# the same automaton until it is deleted.  An entry is the automaton's
+# to_bytes() record (plus its db_id); every hit builds a fresh
+# FiniteAutomaton over it with from_buffer(), which copies no arrays, so a
+# caller that edits what it got back cannot change what the next one gets.
+# The cache is bounded both by entry count and by the records' total size.
+import os
+import threading
+from collections import OrderedDict
+
+from fa_logic import FiniteAutomaton
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+
+class LoadCache:
+    """public_id → automaton, least recently used dropped first."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries, self.max_bytes = max_entries, max_bytes
+        self._entries = OrderedDict()       # public_id → (db_id, record)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, public_id: str):
+        with self._lock:
+            hit = self._entries.get(public_id)
+            if hit is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(public_id)
+            self.hits += 1
+        fa = FiniteAutomaton.from_buffer(hit[1])
+        fa.db_id = hit[0]
+        return fa
+
+    def put(self, fa: FiniteAutomaton) -> None:
+        record = fa.to_bytes()
+        if len(record) > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._drop(fa.id)
+            self._entries[fa.id] = (getattr(fa, "db_id", None), record)
+            self._bytes += len(record)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, old) = self._entries.popitem(last=False)
+                self._bytes -= len(old)
+                self.evictions += 1
+
+    def invalidate(self, public_id: str) -> None:
+        with self._lock:
+            self._drop(public_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _drop(self, public_id) -> None:
+        old = self._entries.pop(public_id, None)
+        if old is not None:
+            self._bytes -= len(old[1])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "entries": len(self._entries),
+                    "bytes": self._bytes}
+
+
+_default = None
+
+
+def load_cache() -> LoadCache:
+    """Process-wide cache bounded by $FA_LOAD_CACHE_ENTRIES and
+    $FA_LOAD_CACHE_BYTES (0 entries turns it off)."""
+    global _default
+    if _default is None:
+        _default = LoadCache(int(os.getenv("FA_LOAD_CACHE_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                             int(os.getenv("FA_LOAD_CACHE_BYTES", DEFAULT_MAX_BYTES)))
+    return _default
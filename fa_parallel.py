@@ -0,0 +1,99 @@
+# fa_parallel.py  ── data-parallel DFA runs over one very long input
+#
+# The input is cut into chunks and every chunk is run from *all* DFA states
+# at once (speculative / enumerative simulation), giving a state → state map
+# per chunk.  The maps are then composed from the start state in order.
+# Workers share the transition table through multiprocessing.shared_memory,
+# so only the chunks and the resulting maps cross process boundaries.
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from fa_engine import DEAD
+
+MIN_CHUNK = 1 << 18        # below this, process start-up costs more than it saves
+
+_worker = {}               # per-process table, filled by _attach()
+
+
+def _attach(shm_name: str, n: int, k: int, chars) -> None:
+    # pool workers share the parent's resource tracker, which already owns
+    # the segment; the parent unlinks it once the pool is done
+    try:
+        shm = shared_memory.SharedMemory(shm_name, track=False)
+    except TypeError:       # Python < 3.13 has no track= switch
+        shm = shared_memory.SharedMemory(shm_name)
+    _worker.update(shm=shm, table=shm.buf.cast("i"), n=n, k=k, chars=chars)
+
+
+def _chunk_map(chunk: str) -> array:
+    """End state of ``chunk`` from every start state (DEAD where it dies).
+
+    Only distinct current states are advanced: ``live`` holds them and
+    ``owner[s]`` says which entry start state ``s`` has merged into.  DFAs
+    synchronise quickly, so ``live`` usually collapses to a state or two and
+    the rest of the chunk runs as a plain serial loop.
+    """
+    table, n, k = _worker["table"], _worker["n"], _worker["k"]
+    codes = _worker["chars"].encode(chunk)
+    if codes is None:
+        return array("i", [DEAD]) * n
+    live = list(range(n))
+    owner = list(range(n))
+    pos, end = 0, len(chunk)
+    while pos < end and len(live) > 1:
+        stop = min(end, pos + 64)
+        for c in codes[pos:stop]:
+            live = [table[s * k + c] if s >= 0 else DEAD for s in live]
+        pos = stop
+        # merge start states whose runs have converged
+        seen, merged, remap = {}, [], []
+        for s in live:
+            j = seen.get(s)
+            if j is None:
+                j = seen[s] = len(merged)
+                merged.append(s)
+            remap.append(j)
+        live = merged
+        owner = [remap[o] for o in owner]
+
+    if pos < end and live[0] >= 0:
+        s = live[0]
+        for c in codes[pos:end]:
+            s = table[s * k + c]
+            if s < 0:
+                break
+        live = [s]
+    return array("i", [live[o] for o in owner])
+
+
+def simulate_parallel(fa, input_string: str, workers: int | None = None,
+                      chunk_size: int | None = None) -> bool:
+    """Whole-string acceptance of a DFA, spread over a process pool."""
+    dfa = fa.compile()
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(MIN_CHUNK, -(-len(input_string) // workers))
+    if workers == 1 or len(input_string) <= chunk_size:
+        return dfa.accepts(input_string)
+
+    n, k = len(dfa.state_names), dfa.n_classes
+    raw = dfa.table.tobytes()
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(raw)))
+    try:
+        shm.buf[:len(raw)] = raw
+        chunks = (input_string[i:i + chunk_size]
+                  for i in range(0, len(input_string), chunk_size))
+        with ProcessPoolExecutor(workers, initializer=_attach,
+                                 initargs=(shm.name, n, k, dfa.chars)) as pool:
+            state = dfa.start
+            for mp in pool.map(_chunk_map, chunks):
+                if state < 0:
+                    pool.shutdown(cancel_futures=True)
+                    break
+                state = mp[state]
+    finally:
+        shm.close()
+        shm.unlink()
+    return state >= 0 and bool(dfa.accept[state])
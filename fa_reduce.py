@@ -0,0 +1,234 @@
+# fa_reduce.py  ── language-preserving NFA shrinking before determinization
+#
+# reduce_graph() runs, on the CompactGraph of an NFA:
+#   1. ε-removal: δ'(p, c) = δ(ε-closure(p), c), and p accepts when its
+#      closure does, so the later steps see a plain NFA over symbol classes;
+#   2. trimming of states unreachable from the start or unable to reach an
+#      accepting state;
+#   3. forward simulation: states that simulate each other are merged, and a
+#      move p→q is dropped when p has a move on the same symbol to a state
+#      strictly simulating q ("little brother" pruning);
+#   4. trimming again, then backward simulation: states that simulate each
+#      other on the reversed automaton are merged.
+# Every step keeps the language, and a smaller NFA means fewer and smaller
+# state sets for subset construction.  Simulation is quadratic in the state
+# count, so above SIMULATION_MAX_STATES only steps 1 and 2 run.
+from array import array
+
+from fa_compact import CompactGraph
+from fa_engine import EPSILON, iter_bits
+
+SIMULATION_MAX_STATES = 1000
+
+
+def _trim(start: int, rows: dict, acc: dict) -> set:
+    """States on some path from ``start`` to an accepting state (plus the
+    start itself, so an empty language keeps a start state)."""
+    reach, todo = {start}, [start]
+    back = {}
+    while todo:
+        p = todo.pop()
+        for mask in rows[p].values():
+            for t in iter_bits(mask):
+                back.setdefault(t, set()).add(p)
+                if t not in reach:
+                    reach.add(t)
+                    todo.append(t)
+    live = {p for p in reach if acc[p]}
+    todo = list(live)
+    while todo:
+        for p in back.get(todo.pop(), ()):
+            if p not in live:
+                live.add(p)
+                todo.append(p)
+    return live | {start}
+
+
+def _restrict(rows: dict, keep: set) -> dict:
+    kmask = sum(1 << p for p in keep)
+    out = {}
+    for p in keep:
+        row = {c: m & kmask for c, m in rows[p].items()}
+        out[p] = {c: m for c, m in row.items() if m}
+    return out
+
+
+def _simulation(rows: dict, label: dict) -> dict:
+    """Greatest simulation preorder: bit q of ``sim[p]`` is set iff q
+    simulates p, i.e. label[p] implies label[q] and every move p -c-> p'
+    is matched by some q -c-> q' with q' simulating p'."""
+    pred, has = {}, {}
+    for q, row in rows.items():
+        for c, mask in row.items():
+            has[c] = has.get(c, 0) | 1 << q
+            for r in iter_bits(mask):
+                pred[c, r] = pred.get((c, r), 0) | 1 << q
+    every = sum(1 << p for p in rows)
+    labelled = sum(1 << p for p in rows if label[p])
+    sim = {}
+    for p, row in rows.items():
+        m = labelled if label[p] else every
+        for c in row:
+            m &= has[c]
+        sim[p] = m
+
+    # pre[c, S]: states with a c-move into the set S; many states share one
+    # simulator set, so this is keyed by the set rather than the state
+    pre = {}
+    changed = True
+    while changed:
+        changed = False
+        for p, row in rows.items():
+            m = sim[p]
+            for c, mask in row.items():
+                for t in iter_bits(mask):
+                    s = sim[t]
+                    q = pre.get((c, s))
+                    if q is None:
+                        q = 0
+                        for r in iter_bits(s):
+                            q |= pred.get((c, r), 0)
+                        pre[c, s] = q
+                    m &= q
+            if m != sim[p]:
+                sim[p], changed = m, True
+    return sim
+
+
+def _classes(sim: dict) -> dict:
+    """state → representative of its class of mutual simulation."""
+    rep = {}
+    for p in sorted(sim):
+        if p not in rep:
+            for q in iter_bits(sim[p]):
+                if q not in rep and sim[q] >> p & 1:
+                    rep[q] = p
+    return rep
+
+
+def _quotient(rows: dict, rep: dict) -> dict:
+    out = {r: {} for r in set(rep.values())}
+    for p, row in rows.items():
+        dst = out[rep[p]]
+        for c, mask in row.items():
+            m = 0
+            for t in iter_bits(mask):
+                m |= 1 << rep[t]
+            dst[c] = dst.get(c, 0) | m
+    return out
+
+
+def _prune(rows: dict, sim: dict) -> int:
+    """Drop moves to states strictly simulated by a sibling target; returns
+    how many were dropped."""
+    dropped = 0
+    for row in rows.values():
+        for c, mask in row.items():
+            keep = mask
+            for t in iter_bits(mask):
+                if sim[t] & mask & ~(1 << t):
+                    keep &= ~(1 << t)
+                    dropped += 1
+            row[c] = keep
+    return dropped
+
+
+def _reverse(rows: dict) -> dict:
+    out = {p: {} for p in rows}
+    for p, row in rows.items():
+        for c, mask in row.items():
+            for t in iter_bits(mask):
+                out[t][c] = out[t].get(c, 0) | 1 << p
+    return out
+
+
+def reduce_graph(g: CompactGraph, start: int):
+    """(graph, start index, stats) of a smaller NFA with the same language.
+
+    ``start`` is a state index of ``g`` (or -1 for no start state).  The
+    result has no ε-moves; its states keep the names of the states they
+    stand for.
+    """
+    n = len(g.names)
+    stats = {"states_before": n, "transitions_before": len(g.edge_sym),
+             "trimmed": 0, "merged_forward": 0, "pruned_transitions": 0,
+             "merged_backward": 0, "simulation": "skipped"}
+    col, k = g.symbol_classes()
+    eps = [0] * n
+    raw = [{} for _ in range(n)]
+    ptr, es, ed = g.row_ptr, g.edge_sym, g.edge_dst
+    for i in range(n):
+        for e in range(ptr[i], ptr[i + 1]):
+            c = col[es[e]]
+            if c < 0:
+                eps[i] |= 1 << ed[e]
+            else:
+                raw[i][c] = raw[i].get(c, 0) | 1 << ed[e]
+
+    keep, rows, acc = [], {}, {}
+    if start >= 0:
+        closure = []
+        for i in range(n):
+            seen, todo = 1 << i, 1 << i
+            while todo:
+                nxt = 0
+                for j in iter_bits(todo):
+                    nxt |= eps[j]
+                todo = nxt & ~seen
+                seen |= nxt
+            closure.append(seen)
+        for i in range(n):
+            row = {}
+            for j in iter_bits(closure[i]):
+                for c, mask in raw[j].items():
+                    row[c] = row.get(c, 0) | mask
+            rows[i] = row
+            acc[i] = any(g.accept[j] for j in iter_bits(closure[i]))
+
+        keep = _trim(start, rows, acc)
+        rows = _restrict(rows, keep)
+        stats["trimmed"] = n - len(keep)
+
+        if len(rows) <= SIMULATION_MAX_STATES:
+            sim = _simulation(rows, acc)
+            rep = _classes(sim)
+            rows = _quotient(rows, rep)
+            stats["merged_forward"] = len(rep) - len(rows)
+            stats["pruned_transitions"] = _prune(rows, sim)
+            start = rep[start]
+            keep = _trim(start, rows, acc)
+            stats["trimmed"] += len(rows) - len(keep)
+            rows = _restrict(rows, keep)
+
+            bsim = _simulation(_reverse(rows), {p: p == start for p in rows})
+            rep = _classes(bsim)
+            merged = _quotient(rows, rep)
+            for p in rows:
+                acc[rep[p]] = acc[rep[p]] or acc[p]
+            stats["merged_backward"] = len(rows) - len(merged)
+            rows, start = merged, rep[start]
+            stats["simulation"] = "done"
+        keep = sorted(rows)
+
+    # back to a CompactGraph over the original (non-ε) symbols
+    new = {p: i for i, p in enumerate(keep)}
+    symbols = [a for a in g.symbols if a != EPSILON]
+    sym_class = [col[g.sym_index[a]] for a in symbols]
+    members = [[] for _ in range(k)]
+    for j, c in enumerate(sym_class):
+        members[c].append(j)
+    row_ptr = array("i", [0])
+    edge_sym, edge_dst = array("i"), array("i")
+    for p in keep:
+        targets = {c: sorted(new[t] for t in iter_bits(m)) for c, m in rows[p].items()}
+        for j in sorted(j for c in targets for j in members[c]):
+            for t in targets[sym_class[j]]:
+                edge_sym.append(j)
+                edge_dst.append(t)
+        row_ptr.append(len(edge_sym))
+    accept = bytearray(acc[p] for p in keep)
+    graph = CompactGraph([g.names[p] for p in keep], symbols, g.alphabet,
+                         row_ptr, edge_sym, edge_dst, accept)
+    stats["states_after"] = len(keep)
+    stats["transitions_after"] = len(edge_sym)
+    return graph, new.get(start, -1), stats
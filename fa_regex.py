@@ -0,0 +1,392 @@
+# fa_regex.py  ── regular expressions → FiniteAutomaton
+#
+# Supported syntax: literals, escapes (\. \* \n \t \d \w \s \D \W \S ...),
+# ".", classes "[a-z0-9_]" / "[^...]", grouping "( )", alternation "|", and
+# the quantifiers "*", "+", "?", "{m}", "{m,}", "{m,n}".  An automaton always
+# matches the whole input, so anchors (^ $ \b ...) are rejected, as is any
+# other letter or digit escape, rather than read as literal characters.
+# Lazy and stacked quantifiers ("a+?", "a??", "x{2}?") are rejected too, and
+# so is "ε", which labels the automaton's empty moves.
+#
+# Two back ends: Thompson's construction gives an ε-NFA, and the position
+# (Glushkov / McNaughton–Yamada) automaton is determinized on the spot to
+# give a DFA directly.  Compiled results are kept in an LRU keyed by the
+# pattern and every option, so compiling a hot pattern again only copies
+# the stored tables into a fresh FiniteAutomaton.  Runs of consecutive
+# characters in a class become one CharRange transition.
+import string
+from functools import lru_cache
+
+from fa_engine import EPSILON, CharRange, iter_bits, split_labels
+from fa_logic import FiniteAutomaton
+
+REGEX_CACHE_SIZE = 256
+MAX_REPEAT = 1000
+MIN_RANGE = 3               # shorter runs of characters stay single symbols
+# what "." and negated classes range over when no alphabet is given
+PRINTABLE = frozenset(string.printable) - frozenset("\x0b\x0c")
+
+_CLASS_ESCAPES = {
+    "d": frozenset(string.digits),
+    "w": frozenset(string.ascii_letters + string.digits + "_"),
+    "s": frozenset(" \t\n\r\f\v"),
+}
+_NEGATED_ESCAPES = {"D": "d", "W": "w", "S": "s"}     # the universe minus the class
+_CHAR_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "f": "\f", "v": "\v"}
+_QUANTIFIERS = ("*", "+", "?", "{")
+
+
+# ── parsing ──────────────────────────────────────────────────────────────────
+# AST nodes are tuples: ("eps",), ("sym", chars), ("cat", [parts]),
+# ("alt", [branches]), ("star", a), ("opt", a).  cat/alt are n-ary so a
+# long pattern does not turn into deep recursion.
+EPS = ("eps",)
+
+
+def _cat(parts):
+    parts = [p for p in parts if p != EPS]
+    return EPS if not parts else parts[0] if len(parts) == 1 else ("cat", parts)
+
+class _Parser:
+    def __init__(self, pattern: str, universe: frozenset, ignore_case: bool):
+        self.p, self.i = pattern, 0
+        self.universe, self.ignore_case = universe - {EPSILON}, ignore_case
+
+    def error(self, msg: str):
+        raise ValueError(f"Bad regex {self.p!r} at {self.i}: {msg}")
+
+    def peek(self):
+        return self.p[self.i] if self.i < len(self.p) else None
+
+    def take(self):
+        ch = self.peek()
+        self.i += 1
+        return ch
+
+    def parse(self):
+        node = self.alt()
+        if self.peek() is not None:
+            self.error("unbalanced ')'")
+        return node
+
+    def alt(self):
+        branches = [self.cat()]
+        while self.peek() == "|":
+            self.take()
+            branches.append(self.cat())
+        return branches[0] if len(branches) == 1 else ("alt", branches)
+
+    def cat(self):
+        parts = []
+        while self.peek() not in (None, "|", ")"):
+            parts.append(self.repeat())
+        return _cat(parts)
+
+    def repeat(self):
+        node = self.atom()
+        if self.peek() not in _QUANTIFIERS:
+            return node
+        q = self.take()
+        if q == "*":
+            node = ("star", node)
+        elif q == "+":
+            node = _cat([node, ("star", node)])
+        elif q == "?":
+            node = ("opt", node)
+        else:
+            node = self.bounded(node)
+        if self.peek() in _QUANTIFIERS:
+            self.error(f"{self.peek()!r} after a quantifier: lazy and stacked "
+                       f"quantifiers are not supported (use a group)")
+        return node
+
+    def bounded(self, node):
+        close = self.p.find("}", self.i)
+        if close < 0:
+            self.error("missing '}'")
+        lo, _, hi = self.p[self.i:close].partition(",")
+        bounds = self.p[self.i:close]
+        self.i = close + 1
+        try:
+            m = int(lo)
+            n = m if "," not in bounds else (int(hi) if hi else None)
+        except ValueError:
+            self.error(f"bad repetition {{{bounds}}}")
+        if (n is not None and n < m) or max(m, n or 0) > MAX_REPEAT:
+            self.error(f"bad repetition {{{bounds}}}")
+        # x{m,n} = x^m (x?)^(n-m), and x{m,} = x^m x*
+        tail = [("star", node)] if n is None else [("opt", node)] * (n - m)
+        return _cat([node] * m + tail)
+
+    def atom(self):
+        ch = self.take()
+        if ch == "(":
+            node = self.alt()
+            if self.take() != ")":
+                self.error("missing ')'")
+            return node
+        if ch == "[":
+            return ("sym", self.char_class())
+        if ch == ".":
+            return ("sym", self.universe)
+        if ch == "\\":
+            return ("sym", self.fold(self.escape()))
+        if ch in _QUANTIFIERS or ch == ")":
+            self.i -= 1
+            self.error(f"unexpected {ch!r}")
+        if ch in ("^", "$"):
+            self.i -= 1
+            self.error(f"anchor {ch!r} is not supported (the whole input must "
+                       f"match; escape it to match the character)")
+        return ("sym", self.fold(frozenset(ch)))
+
+    def range_next(self) -> bool:
+        return self.peek() == "-" and self.p[self.i + 1:self.i + 2] not in ("]", "")
+
+    def class_escape_next(self) -> bool:
+        """Whether the escape after the backslash just taken is a class."""
+        ch = self.peek()
+        return ch in _CLASS_ESCAPES or ch in _NEGATED_ESCAPES
+
+    def escape(self) -> frozenset:
+        ch = self.take()
+        if ch is None:
+            self.error("dangling backslash")
+        if ch in _CLASS_ESCAPES:
+            return _CLASS_ESCAPES[ch]
+        if ch in _NEGATED_ESCAPES:
+            return self.universe - _CLASS_ESCAPES[_NEGATED_ESCAPES[ch]]
+        if ch in _CHAR_ESCAPES:
+            return frozenset(_CHAR_ESCAPES[ch])
+        if ch.isalnum():
+            self.i -= 1
+            self.error(f"unsupported escape '\\{ch}'")
+        return frozenset(ch)
+
+    def char_class(self) -> frozenset:
+        negate = self.peek() == "^"
+        if negate:
+            self.take()
+        chars, first = set(), True
+        while True:
+            ch = self.take()
+            if ch is None:
+                self.error("missing ']'")
+            if ch == "]" and not first:
+                break
+            first = False
+            if ch == "\\":
+                if self.class_escape_next():
+                    chars |= self.escape()
+                    if self.range_next():
+                        self.error("a class escape cannot start a range")
+                    continue
+                (ch,) = self.escape()
+            if self.range_next():
+                self.take()
+                hi = self.take()
+                if hi == "\\":
+                    if self.class_escape_next():
+                        self.error("a class escape cannot end a range")
+                    (hi,) = self.escape()
+                if ord(hi) < ord(ch):
+                    self.error(f"bad range {ch}-{hi}")
+                chars.update(map(chr, range(ord(ch), ord(hi) + 1)))
+            else:
+                chars.add(ch)
+        chars = self.fold(chars)
+        return (self.universe - chars) if negate else chars
+
+    def fold(self, chars) -> frozenset:
+        if EPSILON in chars:
+            self.error(f"{EPSILON!r} labels empty moves and cannot be matched")
+        if self.ignore_case:
+            return frozenset(v for c in chars
+                             for v in (c, c.lower(), c.upper()) if len(v) == 1)
+        return frozenset(chars)
+
+
+def _labels(chars) -> list:
+    """Transition labels for a character set: ranges for long runs."""
+    cps, out, i = sorted(map(ord, chars)), [], 0
+    while i < len(cps):
+        j = i
+        while j + 1 < len(cps) and cps[j + 1] == cps[j] + 1:
+            j += 1
+        if j - i + 1 >= MIN_RANGE:
+            out.append(CharRange(chr(cps[i]), chr(cps[j])))
+        else:
+            out.extend(chr(cp) for cp in cps[i:j + 1])
+        i = j + 1
+    return out
+
+
+# ── Thompson construction ────────────────────────────────────────────────────
+def _thompson(ast):
+    trans: list[dict] = []
+
+    def new():
+        trans.append({})
+        return len(trans) - 1
+
+    def link(a, sym, b):
+        trans[a].setdefault(sym, []).append(b)
+
+    def build(node):
+        kind = node[0]
+        if kind == "cat":
+            s, e = build(node[1][0])
+            for sub in node[1][1:]:
+                s1, e1 = build(sub)
+                link(e, EPSILON, s1)
+                e = e1
+            return s, e
+        s = new()
+        if kind == "eps":
+            return s, s
+        if kind == "sym":
+            e = new()
+            for label in _labels(node[1]):
+                link(s, label, e)
+            return s, e
+        e = new()
+        if kind == "alt":
+            for sub in node[1]:
+                s1, e1 = build(sub)
+                link(s, EPSILON, s1)
+                link(e1, EPSILON, e)
+            return s, e
+        s1, e1 = build(node[1])             # star / opt
+        link(s, EPSILON, s1)
+        link(s, EPSILON, e)
+        link(e1, EPSILON, e)
+        if kind == "star":
+            link(e1, EPSILON, s1)
+        return s, e
+
+    start, end = build(ast)
+    return len(trans), trans, start, {end}
+
+
+# ── position automaton, determinized directly ────────────────────────────────
+def _union(masks) -> int:
+    out = 0
+    for m in masks:
+        out |= m
+    return out
+
+
+def _positions(ast):
+    labels, follow = [], []
+
+    def walk(node):
+        """(nullable, first, last) with position sets as int masks."""
+        kind = node[0]
+        if kind == "eps":
+            return True, 0, 0
+        if kind == "sym":
+            labels.append(node[1])
+            follow.append(0)
+            bit = 1 << (len(labels) - 1)
+            return False, bit, bit
+        if kind in ("star", "opt"):
+            _, f, l = walk(node[1])
+            if kind == "star":
+                for p in iter_bits(l):
+                    follow[p] |= f
+            return True, f, l
+        parts = [walk(sub) for sub in node[1]]
+        if kind == "alt":
+            return (any(n for n, _, _ in parts),
+                    _union(f for _, f, _ in parts),
+                    _union(l for _, _, l in parts))
+        # cat: the last positions so far are followed by the next part's first
+        nullable, first, last = parts[0]
+        for n2, f2, l2 in parts[1:]:
+            for p in iter_bits(last):
+                follow[p] |= f2
+            first |= f2 if nullable else 0
+            last = l2 | (last if n2 else 0)
+            nullable = nullable and n2
+        return nullable, first, last
+
+    nullable, first, last = walk(ast)
+    return labels, follow, nullable, first, last
+
+
+def _position_dfa(ast):
+    labels, follow, nullable, first, last = _positions(ast)
+    init = 1 << len(labels)                 # marker bit for the initial state
+    pos_labels = [_labels(chars) for chars in labels]
+    parts = split_labels({lab for labs in pos_labels for lab in labs})
+    by_atom = {}                            # disjoint atom → positions it feeds
+    for p, labs in enumerate(pos_labels):
+        for lab in labs:
+            for atom in parts[lab]:
+                by_atom[atom] = by_atom.get(atom, 0) | (1 << p)
+    atoms = sorted(by_atom)
+
+    ids, masks, trans = {init: 0}, [init], []
+    i = 0
+    while i < len(masks):
+        s = masks[i]
+        reach = first if s & init else 0
+        for p in iter_bits(s & ~init):
+            reach |= follow[p]
+        row = {}
+        for c in atoms:
+            t = reach & by_atom[c]
+            if t:
+                if t not in ids:
+                    ids[t] = len(masks)
+                    masks.append(t)
+                row[c] = ids[t]
+        trans.append(row)
+        i += 1
+    accept = {i for i, s in enumerate(masks)
+              if s & last or (s & init and nullable)}
+    return len(masks), trans, 0, accept
+
+
+# ── public API ───────────────────────────────────────────────────────────────
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def _compile(pattern: str, dfa: bool, ignore_case: bool, alphabet):
+    universe = alphabet if alphabet is not None else PRINTABLE
+    ast = _Parser(pattern, universe, ignore_case).parse()
+    n, trans, start, accept = (_position_dfa if dfa else _thompson)(ast)
+    prefix = "d" if dfa else "n"
+    rows = tuple(tuple((sym, tuple(f"{prefix}{t}" for t in ([dst] if dfa else dst)))
+                       for sym, dst in sorted(row.items()))
+                 for row in trans)
+    symbols = frozenset(sym for row in trans for sym in row) - {EPSILON}
+    return (prefix, n, rows, start, frozenset(accept),
+            symbols | ((alphabet or frozenset()) - {EPSILON}))
+
+
+def from_regex(pattern: str, dfa: bool = False, ignore_case: bool = False,
+               alphabet=None, name: str | None = None) -> FiniteAutomaton:
+    """Compile ``pattern``: an ε-NFA (Thompson) or, with ``dfa``, a DFA.
+
+    ``alphabet`` is what "." and "[^...]" range over (printable ASCII by
+    default) and is added to the result's alphabet.
+    """
+    prefix, n, rows, start, accept, symbols = _compile(
+        pattern, dfa, ignore_case,
+        frozenset(alphabet) if alphabet is not None else None)
+    states = [f"{prefix}{i}" for i in range(n)]
+    transitions = {states[i]: {sym: (dst[0] if dfa else list(dst)) for sym, dst in row}
+                   for i, row in enumerate(rows)}
+    return FiniteAutomaton(
+        id=None,
+        name=name or pattern,
+        states=set(states),
+        alphabet=set(symbols),
+        transitions=transitions,
+        start_state=states[start],
+        accept_states={states[i] for i in accept},
+        is_dfa=dfa,
+    )
+
+
+def regex_cache_info():
+    return _compile.cache_info()
@@ -0,0 +1,132 @@
+# fa_search.py  ── find every occurrence of a language inside a text
+#
+# Matches are non-overlapping and leftmost-longest (POSIX style); empty
+# matches are not reported.  The scan is one forward pass of the DFA with
+# a Σ* prefix: a fresh thread starts at every position, and since two
+# threads in the same DFA state share their future, only the one that
+# started first is kept.  Live threads therefore fit in one tuple of DFA
+# states ordered by start, and the start offsets ride along in a parallel
+# list.  Moves between such tuples are memoised like a lazy DFA.
+#
+# A reverse-DFA pass would need random access back to each match start;
+# tagging threads with their start needs none, which is what lets the
+# same scanner run over streams and mmap'ed files.
+from fa_engine import DEAD
+from fa_stream import iter_file_chunks, iter_text_chunks
+
+MEMO_LIMIT = 1 << 16        # memoised tuple moves before the memo is reset
+
+
+class Searcher:
+    def __init__(self, fa):
+        dfa = fa.convert_to_dfa().compile()
+        self.dfa = dfa
+        self._reset_memo()
+
+    def _reset_memo(self):
+        # fresh containers, not cleared ones: a scan that is still running
+        # keeps the old tuple list to re-intern its current tuple from
+        self._ids, self._tuples, self._first_accept = {}, [], []
+        self._memo = {}
+        self._epoch = getattr(self, "_epoch", 0) + 1
+        self._intern(())
+
+    def _intern(self, tup) -> int:
+        tid = self._ids.get(tup)
+        if tid is None:
+            tid = self._ids[tup] = len(self._tuples)
+            self._tuples.append(tup)
+            acc = self.dfa.accept
+            self._first_accept.append(
+                next((j for j, q in enumerate(tup) if acc[q]), -1))
+        return tid
+
+    def _move(self, tid, c, inject):
+        """Successor tuple id and, per new thread, its index in the old
+        tuple (the injected thread, if any, has index len(old))."""
+        key = (tid, c, inject)
+        hit = self._memo.get(key)
+        if hit is None:
+            dfa = self.dfa
+            seq = self._tuples[tid]
+            if inject and dfa.start != DEAD and dfa.start not in seq:
+                seq = seq + (dfa.start,)
+            new, src = [], []
+            k = dfa.n_classes
+            if 0 <= c < k:          # otherwise a character outside Σ
+                table = dfa.table
+                for j, q in enumerate(seq):
+                    q2 = table[q * k + c]
+                    if q2 != DEAD and q2 not in new:
+                        new.append(q2)
+                        src.append(j)
+            hit = self._memo[key] = (self._intern(tuple(new)), tuple(src))
+        return hit
+
+    def finditer(self, chunks):
+        """Yield ``(start, end)`` character spans from a stream of str chunks."""
+        codes = self.dfa.chars.codes
+        buf, base, pos = b"", 0, 0     # class codes of text[base:base + len(buf)]
+        tid, starts, best = 0, [], None
+        epoch, tuples = self._epoch, self._tuples
+        it = iter(chunks)
+        while True:
+            if pos - base >= len(buf):
+                chunk = next(it, None)
+                if chunk is None:
+                    if best is None:
+                        break
+                    # threads still hoping for a longer match died with the
+                    # input: settle for best and rescan the text after it
+                    yield best
+                    pos, tid, starts, best = best[1], 0, [], None
+                    continue
+                # after a match only text past its end may be rescanned
+                keep = best[1] if best else pos
+                tail, new = buf[keep - base:], codes(chunk)
+                if type(tail) is not type(new):
+                    tail, new = list(tail), list(new)
+                buf, base = tail + new, keep
+                continue
+            if epoch != self._epoch:        # another scan reset the memo
+                tid = self._intern(tuples[tid])
+                epoch, tuples = self._epoch, self._tuples
+            if len(self._memo) > MEMO_LIMIT:
+                tup = self._tuples[tid]
+                self._reset_memo()
+                tid = self._intern(tup)
+                epoch, tuples = self._epoch, self._tuples
+
+            c = buf[pos - base]
+            tid, src = self._move(tid, c, best is None)
+            n = len(starts)
+            starts = [starts[j] if j < n else pos for j in src]
+            pos += 1
+
+            j = self._first_accept[tid]
+            if j >= 0:
+                best = (starts[j], pos)
+            if best:
+                # threads that started after the best match cannot beat it
+                keep = 0
+                while keep < len(starts) and starts[keep] <= best[0]:
+                    keep += 1
+                if keep < len(starts):
+                    starts = starts[:keep]
+                    tid = self._intern(self._tuples[tid][:keep])
+                if not starts:
+                    yield best
+                    pos, tid, best = best[1], 0, None
+
+
+def finditer(fa, source, encoding: str = "latin-1"):
+    """Lazily yield ``(start, end)`` spans of every match of ``fa`` in
+    ``source`` (str, bytes-like, mmap, or an iterable of chunks)."""
+    return fa.searcher().finditer(iter_text_chunks(source, encoding))
+
+
+def finditer_file(fa, path: str, encoding: str = "latin-1"):
+    """finditer over a file mapped with mmap; spans are byte offsets
+    under the default latin-1 decoding."""
+    return fa.searcher().finditer(
+        iter_text_chunks(iter_file_chunks(path), encoding))
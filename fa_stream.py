@@ -0,0 +1,120 @@
+# fa_stream.py  ── incremental matching of unbounded inputs
+#
+# A StreamMatcher carries the current DFA state (or NFA state set) across
+# feed() calls, so an input never has to exist as one str in memory.
+import codecs
+import mmap
+
+from fa_engine import DEAD
+
+CHUNK_SIZE = 1 << 20
+
+
+class StreamMatcher:
+    """Whole-input acceptance over chunks of ``str`` or bytes-like data.
+
+    Byte chunks (bytes, bytearray, memoryview, mmap slices) go through an
+    incremental decoder, so a multi-byte character may straddle two chunks.
+    Once no continuation can be accepted any more ``dead`` is set and
+    further chunks are skipped without being looked at.
+    """
+
+    def __init__(self, fa, encoding: str = "utf-8", errors: str = "replace"):
+        self.encoding, self.errors = encoding, errors
+        if fa.is_dfa:
+            self._engine = fa.compile()
+        else:
+            self._engine = fa.lazy_dfa()
+        self._nfa = not fa.is_dfa
+        self.reset()
+
+    def reset(self) -> None:
+        eng = self._engine
+        self._state = eng.nfa.start if self._nfa else eng.start
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(self.errors)
+        self.consumed = 0           # characters fed so far
+
+    @property
+    def dead(self) -> bool:
+        return self._state == (0 if self._nfa else DEAD)
+
+    def feed(self, chunk) -> bool:
+        """Consume one chunk; returns False once the input is rejected."""
+        if self.dead:
+            return False
+        if not isinstance(chunk, str):
+            chunk = self._decoder.decode(chunk)
+        self._state = self._engine.run(chunk, self._state)
+        self.consumed += len(chunk)
+        return not self.dead
+
+    def result(self) -> bool:
+        """Whether everything fed so far is accepted."""
+        if not self.dead:
+            tail = self._decoder.decode(b"", final=True)
+            if tail:
+                self.feed(tail)
+        if self.dead:
+            return False
+        if self._nfa:
+            return bool(self._state & self._engine.nfa.accept)
+        return bool(self._engine.accept[self._state])
+
+
+def iter_file_chunks(path: str, chunk_size: int = CHUNK_SIZE):
+    """Yield zero-copy memoryview slices of a file mapped with mmap."""
+    with open(path, "rb") as fh:
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:          # empty file: nothing to map
+            return
+        with mm:
+            view = memoryview(mm)
+            try:
+                for off in range(0, len(mm), chunk_size):
+                    chunk = view[off:off + chunk_size]
+                    try:
+                        yield chunk
+                    finally:
+                        chunk.release()
+            finally:
+                view.release()
+
+
+def match_file(fa, path: str, chunk_size: int = CHUNK_SIZE,
+               encoding: str = "utf-8") -> bool:
+    """Does ``fa`` accept the whole content of ``path``?  Stops at the
+    first chunk after which no continuation can be accepted."""
+    m = StreamMatcher(fa, encoding)
+    for chunk in iter_file_chunks(path, chunk_size):
+        if not m.feed(chunk):
+            break
+    return m.result()
+
+
+def iter_text_chunks(source, encoding: str = "latin-1",
+                     chunk_size: int = CHUNK_SIZE):
+    """Normalise ``source`` to a stream of str chunks.
+
+    Accepts a str, a bytes-like object (bytes, bytearray, memoryview,
+    mmap), or any iterable of str / bytes-like chunks.  Bytes are decoded
+    incrementally; with the default latin-1 every byte is one character,
+    so character offsets are byte offsets.
+    """
+    if isinstance(source, str):
+        yield source
+        return
+    decoder = codecs.getincrementaldecoder(encoding)("replace")
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        view = memoryview(source)
+        try:
+            for off in range(0, len(view), chunk_size):
+                yield decoder.decode(view[off:off + chunk_size])
+        finally:
+            view.release()
+    else:
+        for chunk in source:
+            yield chunk if isinstance(chunk, str) else decoder.decode(chunk)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
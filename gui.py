@@ -7,6 +7,10 @@ from automaton_manager import manage_automaton
 
 
 class AutomatonGUI:
+    # keep NFA→DFA conversion from freezing the window on state explosion
+    CONVERT_MAX_STATES = 100_000
+    CONVERT_TIME_BUDGET = 10.0      # seconds
+
     def __init__(self, root: tk.Tk):
         self.root = root
         root.title("🌀 Finite Automaton Designer")
@@ -23,11 +27,23 @@ class AutomatonGUI:
                         ("🔧 Minimize", self.minimize)]:
             tb.Button(top, text=txt, command=fn, bootstyle="info").pack(side="left", padx=5)
 
+        find = tb.Frame(root); find.pack(fill="x", padx=10, pady=(8, 0))
+        tb.Label(find, text="🔍 Name:").pack(side="left")
+        self.name_filter = tk.StringVar()
+        self.name_filter.trace_add("write", lambda *_: self.refresh())
+        tb.Entry(find, textvariable=self.name_filter, width=30).pack(side="left", padx=5)
+
+        # rows come a page at a time (counts only); scrolling to the bottom fetches more
         cols = ("DB‑ID", "Public‑ID", "Name", "#States", "#Σ", "#δ")
-        self.table = tb.Treeview(root, columns=cols, show="headings", height=10, bootstyle="dark")
+        box = tb.Frame(root); box.pack(fill="both", expand=True, padx=10, pady=8)
+        self.table = tb.Treeview(box, columns=cols, show="headings", height=10, bootstyle="dark")
         for c in cols:
             self.table.heading(c, text=c); self.table.column(c, anchor="center")
-        self.table.pack(fill="both", expand=True, padx=10, pady=8)
+        self.scroll = tb.Scrollbar(box, orient="vertical", command=self.table.yview)
+        self.table.configure(yscrollcommand=self.on_scroll)
+        self.scroll.pack(side="right", fill="y")
+        self.table.pack(side="left", fill="both", expand=True)
+        self.next_page = None
 
         self.out = tk.Text(root, height=12, font=("Consolas", 10), bg="#1e1e2f", fg="white")
         self.out.pack(fill="x", padx=10, pady=5)
@@ -40,20 +56,32 @@ class AutomatonGUI:
     # Helpers
     def refresh(self):
         self.table.delete(*self.table.get_children())
-        res = manage_automaton(action="list").get("automata", [])
-        for fa in res:
-            tc = sum(len(v) if isinstance(v, (set, list)) else 1
-                     for mp in fa.transitions.values() for v in mp.values())
+        self.next_page = None
+        self.load_page()
+
+    def load_page(self):
+        res = manage_automaton(action="summaries", after=self.next_page,
+                               name=self.name_filter.get().strip() or None)
+        if "error" in res:
+            self.next_page = None
+            return
+        for row in res["summaries"]:
             self.table.insert("", "end", values=(
-                getattr(fa, "db_id", ""), fa.id, fa.name,
-                len(fa.states), len(fa.alphabet), tc))
+                row["db_id"], row["public_id"], row["name"],
+                row["states"], row["symbols"], row["transitions"]))
+        self.next_page = res["next"]
+
+    def on_scroll(self, first, last):
+        self.scroll.set(first, last)
+        if self.next_page is not None and float(last) >= 1.0:
+            self.load_page()
 
     def display(self, fa):
         self.out.config(state="normal"); self.out.delete("1.0", "end")
         self.out.insert("end", f"Name: {fa.name}   ({'DFA' if fa.is_dfa else 'NFA'})\n")
         self.out.insert("end", f"Public‑ID: {fa.id}\n")
         self.out.insert("end", f"States: {', '.join(sorted(fa.states))}\n")
-        self.out.insert("end", f"Alphabet: {', '.join(sorted(fa.alphabet))}\n")
+        self.out.insert("end", f"Alphabet: {', '.join(map(str, sorted(fa.alphabet)))}\n")
         self.out.insert("end", f"Start: {fa.start_state}\n")
         self.out.insert("end", f"Final: {', '.join(sorted(fa.accept_states))}\n\nTransitions:\n")
         for s in sorted(fa.transitions):
@@ -257,7 +285,9 @@ class AutomatonGUI:
 
     def convert(self):
         if not self.current: return Messagebox.show_error("Load an FA first.")
-        res = manage_automaton(action="convert", automaton=self.current)
+        res = manage_automaton(action="convert", automaton=self.current,
+                               max_states=self.CONVERT_MAX_STATES,
+                               time_budget=self.CONVERT_TIME_BUDGET)
         if "error" in res: return Messagebox.show_error(res["error"])
         self.current = res["automaton"]; self.display(self.current); self.refresh()
 
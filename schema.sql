@@ -2,7 +2,12 @@ CREATE TABLE IF NOT EXISTS NFAs (
     id INT AUTO_INCREMENT PRIMARY KEY,
     public_id VARCHAR(255) UNIQUE NOT NULL,
     name VARCHAR(255) NOT NULL,
-    type ENUM('NFA', 'DFA') NOT NULL
+    type ENUM('NFA', 'DFA') NOT NULL,
+    fingerprint CHAR(64) NULL,
+    n_states INT NULL,
+    n_symbols INT NULL,
+    n_transitions INT NULL,
+    INDEX idx_nfas_fingerprint (fingerprint)
 );
 
 CREATE TABLE IF NOT EXISTS NFA_States (
@@ -19,6 +24,7 @@ CREATE TABLE IF NOT EXISTS NFA_Transitions (
     nfa_id INT,
     from_state_id INT,
     symbol VARCHAR(10),
+    symbol_end VARCHAR(10) NULL,
     to_state_id INT,
     FOREIGN KEY (nfa_id) REFERENCES NFAs(id),
     FOREIGN KEY (from_state_id) REFERENCES NFA_States(id),
@@ -0,0 +1,63 @@
+# test_binary.py  ── to_bytes()/from_buffer() round trips and corrupt records
+import random
+
+import pytest
+
+from fa_logic import CharRange, FiniteAutomaton
+
+
+def random_fa(rnd, dfa):
+    n = rnd.randint(1, 8)
+    states = [f"s{i}" for i in range(n)] + ["é✓"]
+    symbols = ["a", "b", CharRange("0", "9")] + ([] if dfa else ["ε"])
+    delta = {}
+    for s in states:
+        row = {}
+        for sym in symbols:
+            if rnd.random() < 0.6:
+                row[sym] = rnd.choice(states) if dfa else rnd.sample(states, rnd.randint(1, 2))
+        delta[s] = row
+    accept = {s for s in states if rnd.random() < 0.3}
+    return FiniteAutomaton(rnd.choice([None, "id-1"]), rnd.choice([None, "näme"]),
+                           set(states), set(symbols) | {"z"}, delta, states[0], accept, dfa)
+
+
+@pytest.mark.parametrize("dfa", [False, True])
+def test_round_trip(dfa):
+    rnd = random.Random(dfa)
+    for _ in range(100):
+        fa = random_fa(rnd, dfa)
+        data = fa.to_bytes()
+        for buf in (data, memoryview(data), bytearray(data)):
+            back = FiniteAutomaton.from_buffer(buf)
+            assert (back.id, back.name, back.start_state, back.is_dfa) == \
+                (fa.id, fa.name, fa.start_state, fa.is_dfa)
+            assert back.alphabet == fa.alphabet
+            assert set(back.accept_states) == set(fa.accept_states)
+            assert back.transitions.to_dict() == fa.transitions.to_dict()
+            assert back.fingerprint() == fa.fingerprint()
+            assert back.to_bytes() == data
+
+
+def test_corrupt_records_raise_value_error():
+    rnd = random.Random(2)
+    records = [random_fa(rnd, dfa).to_bytes() for dfa in (False, True) for _ in range(10)]
+    for _ in range(3000):
+        data = bytearray(rnd.choice(records))
+        if rnd.random() < 0.3:
+            del data[rnd.randrange(len(data)):]
+        else:
+            for _ in range(rnd.randint(1, 4)):
+                data[rnd.randrange(len(data))] = rnd.randrange(256)
+        try:
+            fa = FiniteAutomaton.from_buffer(bytes(data))
+        except ValueError:
+            continue
+        fa.transitions.to_dict()        # whatever loads must be usable
+        fa.fingerprint()
+
+
+def test_not_a_record():
+    for data in (b"", b"FAUT", b"x" * 64):
+        with pytest.raises(ValueError):
+            FiniteAutomaton.from_buffer(data)
@@ -0,0 +1,127 @@
+# test_cache.py  ── disk cache of compiled DFAs, load cache, classifier cache
+import os
+import random
+
+import pytest
+
+import fa_classifier
+from fa_cache import DiskCache, cached_dfa, compiled_dfa, pack_dfa, unpack_dfa
+from fa_lru import LoadCache
+from fa_regex import from_regex
+
+PATTERNS = ["ab*", "(a|b)*abb", "[0-9]+(\\.[0-9]+)?", "x{2,3}|y"]
+WORDS = ["", "a", "ab", "abb", "aabb", "12", "1.5", "1.", "xx", "xxx", "y", "yy"]
+
+
+# ── DiskCache ───────────────────────────────────────────────────────────────
+def test_pack_round_trip():
+    for p in PATTERNS:
+        fa = from_regex(p, dfa=True)
+        eng, alphabet = unpack_dfa(pack_dfa(fa.compile(), fa.alphabet))
+        assert alphabet == fa.alphabet
+        assert list(map(bool, eng.accepts_many(WORDS))) == [fa.simulate(w) for w in WORDS]
+
+
+def test_entries_survive_a_new_cache(tmp_path):
+    fa = from_regex("(a|b)*abb")
+    first = compiled_dfa(fa, minimal=True, cache=DiskCache(str(tmp_path)))
+    again = DiskCache(str(tmp_path))
+    second = compiled_dfa(fa, minimal=True, cache=again)
+    assert again.stats()["hits"] == 1
+    assert list(second.accepts_many(WORDS)) == list(first.accepts_many(WORDS))
+    res = cached_dfa(fa, minimal=True, cache=again)
+    assert res.is_dfa and len(res.id) <= 64
+    assert [res.simulate(w) for w in WORDS] == [fa.simulate(w) for w in WORDS]
+
+
+def test_corrupt_entry_is_a_miss_and_removed(tmp_path):
+    cache, rnd = DiskCache(str(tmp_path)), random.Random(0)
+    fa = from_regex("[0-9]+(\\.[0-9]+)?", dfa=True)
+    good = pack_dfa(fa.compile(), fa.alphabet)
+    for i in range(300):
+        data = bytearray(good)
+        if i % 3 == 0:
+            del data[rnd.randrange(len(data)):]
+        else:
+            for _ in range(rnd.randint(1, 4)):
+                data[rnd.randrange(len(data))] = rnd.randrange(256)
+        with open(cache.path("k"), "wb") as fh:
+            fh.write(data)
+        hit = cache.get("k")
+        if hit is None:
+            assert not os.path.exists(cache.path("k"))
+        else:
+            hit[0].accepts_many(WORDS)      # a surviving entry must still run
+    assert cache.get("missing") is None
+
+
+def test_eviction_keeps_the_directory_bounded(tmp_path):
+    fa = from_regex("(a|b)*abb", dfa=True)
+    size = len(pack_dfa(fa.compile(), fa.alphabet))
+    cache = DiskCache(str(tmp_path), max_bytes=3 * size)
+    for i in range(10):
+        cache.put(f"k{i}", fa.compile(), fa.alphabet)
+    files = [n for n in os.listdir(tmp_path) if n.endswith(DiskCache.SUFFIX)]
+    assert len(files) == 3 and cache.stats()["evictions"] == 7
+    assert cache.get("k9") is not None
+
+
+# ── LoadCache ───────────────────────────────────────────────────────────────
+def stored(i):
+    fa = from_regex(PATTERNS[i % len(PATTERNS)], dfa=True)
+    fa.id, fa.db_id = f"fa{i}", i
+    return fa
+
+
+def test_load_cache_bounds_and_stats():
+    cache = LoadCache(max_entries=3)
+    for i in range(5):
+        cache.put(stored(i))
+    assert cache.get("fa0") is None and cache.get("fa1") is None
+    hit = cache.get("fa4")
+    assert hit.db_id == 4 and hit.fingerprint() == stored(4).fingerprint()
+    assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 2,
+                             "entries": 3, "bytes": cache.stats()["bytes"]}
+    record = len(stored(4).to_bytes())
+    small = LoadCache(max_bytes=record)
+    small.put(stored(4))
+    small.put(stored(8))
+    assert small.stats()["entries"] == 1 and small.get("fa8") is not None
+    cache.invalidate("fa4")
+    assert cache.get("fa4") is None
+
+
+def test_load_cache_hands_out_copies():
+    cache = LoadCache()
+    cache.put(stored(1))
+    mine = cache.get("fa1")
+    mine.accept_states = set()
+    assert cache.get("fa1").fingerprint() == stored(1).fingerprint()
+
+
+# ── classifier cache ────────────────────────────────────────────────────────
+def test_classifier_matches_members_and_is_cached(monkeypatch):
+    monkeypatch.setattr(fa_classifier, "_cache", type(fa_classifier._cache)())
+    members = [(p, from_regex(p)) for p in PATTERNS]
+    loads = []
+
+    def load():
+        loads.append(1)
+        return members
+
+    key = tuple((p, fa.fingerprint()) for p, fa in members)
+    clf = fa_classifier.get_classifier(key, load)
+    assert fa_classifier.get_classifier(key, load) is clf and len(loads) == 1
+    for w in WORDS + ["".join(random.Random(i).choices("ab01.xy", k=6)) for i in range(200)]:
+        assert clf.classify(w) == [p for p, fa in members if fa.simulate(w)]
+    for i in range(fa_classifier.CACHE_SIZE):
+        fa_classifier.get_classifier(("other", i), lambda: members[:1])
+    fa_classifier.get_classifier(key, load)
+    assert len(loads) == 2                  # dropped as least recently used
+
+
+def test_classifier_with_few_memo_states_agrees():
+    members = [(p, from_regex(p, dfa=True)) for p in PATTERNS]
+    clf = fa_classifier.Classifier(members, max_states=2)
+    for w in WORDS:
+        assert clf.classify(w) == [p for p, fa in members if fa.simulate(w)]
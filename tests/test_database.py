@@ -0,0 +1,245 @@
+# test_database.py  ── fa_database / automaton_manager on a SQLite stand-in
+#
+# The pool is given connections to a SQLite file that speak just enough of
+# mysql.connector's interface (%s placeholders, dictionary cursors,
+# start_transaction) for the queries here.
+import random
+import sqlite3
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import automaton_manager
+import db
+import fa_cache
+import fa_database
+import fa_lru
+from fa_logic import CharRange, FiniteAutomaton
+from fa_regex import from_regex
+
+SCHEMA = """
+CREATE TABLE NFAs (id INTEGER PRIMARY KEY, public_id TEXT UNIQUE, name TEXT,
+                   type TEXT, fingerprint TEXT, n_states INT, n_symbols INT,
+                   n_transitions INT);
+CREATE TABLE NFA_States (id INTEGER PRIMARY KEY, nfa_id INT, state TEXT,
+                         is_start INT, is_final INT);
+CREATE TABLE NFA_Transitions (id INTEGER PRIMARY KEY, nfa_id INT,
+                              from_state_id INT, symbol TEXT, symbol_end TEXT,
+                              to_state_id INT);
+CREATE TABLE NFA_InputTests (id INTEGER PRIMARY KEY, nfa_id INT,
+                             input_string TEXT, is_accepted INT);
+CREATE TABLE NFA_Conversions (id INTEGER PRIMARY KEY, source_nfa_id INT,
+                              result_dfa_id INT, conversion_type TEXT);
+"""
+
+
+class Cursor:
+    def __init__(self, conn, dictionary=False):
+        self.cur, self.dictionary = conn.cursor(), dictionary
+
+    def execute(self, sql, args=()):
+        self.cur.execute(sql.replace("%s", "?"), tuple(args))
+        self.lastrowid = self.cur.lastrowid
+
+    def executemany(self, sql, rows):
+        self.cur.executemany(sql.replace("%s", "?"), rows)
+
+    def fetchall(self):
+        rows = self.cur.fetchall()
+        if not self.dictionary:
+            return rows
+        names = [d[0] for d in self.cur.description]
+        return [dict(zip(names, r)) for r in rows]
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+
+    def close(self):
+        pass
+
+
+class Connection:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.in_transaction = False
+
+    def cursor(self, dictionary=False):
+        return Cursor(self.conn, dictionary)
+
+    def start_transaction(self):
+        self.conn.execute("BEGIN")
+        self.in_transaction = True
+
+    def commit(self):
+        self.conn.execute("COMMIT")
+        self.in_transaction = False
+
+    def rollback(self):
+        self.conn.execute("ROLLBACK")
+        self.in_transaction = False
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self.conn.close()
+
+
+@pytest.fixture
+def sql(tmp_path, monkeypatch):
+    """Raw connection to the stand-in database the pool now points at."""
+    path = str(tmp_path / "automata.db")
+    raw = sqlite3.connect(path, isolation_level=None)
+    raw.executescript(SCHEMA)
+    monkeypatch.setattr(db, "_pool", db.ConnectionPool(2, factory=lambda: Connection(path)))
+    monkeypatch.setattr(fa_cache, "_default", fa_cache.DiskCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(fa_lru, "_default", fa_lru.LoadCache())
+    yield raw
+    raw.close()
+
+
+def rows(sql, table):
+    return sql.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def saved(pattern, dfa=True, public_id=None):
+    fa = from_regex(pattern, dfa=dfa)
+    fa.id = public_id
+    fa_database.save_automaton_to_db(fa)
+    return fa
+
+
+# ── derived results ─────────────────────────────────────────────────────────
+@pytest.mark.parametrize("action", ["union", "complement"])
+def test_unsaved_operand_writes_nothing(sql, action):
+    fa = saved("ab*")
+    before = rows(sql, "NFAs"), rows(sql, "NFA_Conversions")
+    unsaved = from_regex("a+", dfa=True)
+    args = {"automaton": fa, "other": unsaved} if action == "union" else {"automaton": unsaved}
+    assert "error" in automaton_manager.manage_automaton(action, **args)
+    assert (rows(sql, "NFAs"), rows(sql, "NFA_Conversions")) == before
+
+
+def test_derived_ids_fit_and_do_not_collide(sql):
+    a, b = saved("ab*", public_id="a" * 64), saved("a+", public_id="b" * 64)
+    ids, prints = set(), set()
+    for action, opts in [("union", {}), ("union", {"minimize": True}),
+                         ("complement", {}), ("complement", {"alphabet": "abc"})]:
+        args = {"automaton": a, "other": b} if action == "union" else {"automaton": a}
+        out = automaton_manager.manage_automaton(action, **args, **opts)
+        assert "error" not in out, out
+        ids.add(out["automaton"].id)
+        prints.add(out["automaton"].fingerprint())
+    # one stored row per distinct result, each under its own short id
+    assert len(ids) == len(prints) == rows(sql, "NFAs") - 2
+    assert all(len(i) <= 64 for i in ids)
+    assert rows(sql, "NFA_Conversions") == 6
+
+
+# ── count columns ───────────────────────────────────────────────────────────
+def counts(sql, pk):
+    return sql.execute("SELECT n_states, n_symbols, n_transitions FROM NFAs "
+                       "WHERE id = ?", (pk,)).fetchone()
+
+
+def test_row_helpers_keep_counts(sql):
+    fa = FiniteAutomaton(None, "rows", {"p", "q"}, {"a", "b", CharRange("0", "9")},
+                         {"p": {"a": ["q", "p"], "ε": ["q"], CharRange("0", "9"): ["q"]},
+                          "q": {"a": ["q"], "b": ["p"]}}, "p", {"q"}, False)
+    pk, public_id = fa_database.create_automaton("rows")
+    assert counts(sql, pk) == (0, 0, 0)
+    ids = {s: fa_database.add_state(pk, s, s == "p", s == "q") for s in sorted(fa.states)}
+    for src, mp in fa.transitions.items():
+        for sym, dsts in mp.items():
+            for dst in dsts:
+                fa_database.add_transition(pk, ids[src], sym, ids[dst])
+    assert counts(sql, pk) == fa_database._counts(fa) == (2, 3, 6)
+    fa.id = "rows-bulk"
+    bulk_pk, _ = fa_database.save_automaton_to_db(fa)
+    assert counts(sql, bulk_pk) == counts(sql, pk)
+    assert fa_database.load_automaton_by_id(public_id).fingerprint() == fa.fingerprint()
+
+
+# ── bulk save, load, list, delete ───────────────────────────────────────────
+def random_nfa(rnd, name):
+    n = rnd.randint(1, 12)
+    states = [f"s{i}" for i in range(n)]
+    symbols = ["a", "b", "ε", CharRange("0", "9")]
+    delta = {s: {sym: rnd.sample(states, rnd.randint(1, min(2, n)))
+                 for sym in symbols if rnd.random() < 0.5} for s in states}
+    # only transitions are stored, so the alphabet is what they use
+    used = {sym for row in delta.values() for sym in row} - {"ε"}
+    return FiniteAutomaton(None, name, set(states), used, delta, "s0",
+                           {s for s in states if rnd.random() < 0.3}, False)
+
+
+@pytest.fixture
+def stored(sql):
+    rnd = random.Random(0)
+    fas = [random_nfa(rnd, f"nfa {i}") for i in range(7)] + [from_regex("(a|b)*abb", dfa=True)]
+    keys = fa_database.save_automata_to_db(fas)
+    return fas, keys
+
+
+def test_bulk_save_round_trip(sql, stored):
+    fas, keys = stored
+    assert [(fa.db_id, fa.id) for fa in fas] == keys
+    ids = [pub for _, pub in keys]
+    fa_lru._default.clear()
+    got = fa_database.load_automata(ids[::-1] + ["nope"])
+    assert [g.id for g in got] == ids[::-1]
+    for g, fa in zip(got, fas[::-1]):
+        assert g.db_id == fa.db_id and g.is_dfa == fa.is_dfa
+        assert g.fingerprint() == fa.fingerprint()
+    again = fa_database.load_automata(ids)              # now from the load cache
+    assert [g.fingerprint() for g in again] == [fa.fingerprint() for fa in fas]
+    assert len(fa_database.load_automata()) == len(fas)
+    assert fa_database.stored_keys(ids[:2] + ["nope"]) == \
+        [(fa.id, fa.db_id, fa.fingerprint()) for fa in fas[:2]]
+
+
+def test_failed_bulk_save_writes_nothing(sql, stored):
+    fas, keys = stored
+    before = [rows(sql, t) for t in ("NFAs", "NFA_States", "NFA_Transitions")]
+    clash = [random_nfa(random.Random(1), "new"), random_nfa(random.Random(2), "dup")]
+    clash[1].id = keys[0][1]
+    with pytest.raises(sqlite3.IntegrityError):
+        fa_database.save_automata_to_db(clash)
+    assert [rows(sql, t) for t in ("NFAs", "NFA_States", "NFA_Transitions")] == before
+    assert getattr(clash[0], "db_id", None) is None
+
+
+def test_summaries_page_through_everything(sql, stored):
+    fas, _ = stored
+    seen, after = [], None
+    while True:
+        page, after = fa_database.list_summaries(after=after, limit=3)
+        seen += page
+        if after is None:
+            break
+    assert [r["db_id"] for r in seen] == sorted((fa.db_id for fa in fas), reverse=True)
+    by_pk = {fa.db_id: fa for fa in fas}
+    for r in seen:
+        assert (r["states"], r["symbols"], r["transitions"]) == \
+            fa_database._counts(by_pk[r["db_id"]])
+    assert {r["name"] for r in fa_database.list_summaries(name="nfa")[0]} == \
+        {f"nfa {i}" for i in range(7)}
+
+
+def test_delete_removes_rows_and_cached_copy(sql, stored):
+    fas, _ = stored
+    fa = fas[0]
+    assert "error" not in automaton_manager.manage_automaton("convert", automaton=fa)
+    automaton_manager.manage_automaton("simulate", automaton=fa, input_string="ab")
+    assert rows(sql, "NFA_InputTests") == 1
+    assert fa_database.load_automaton_by_id(fa.id) is not None
+    assert fa_database.delete_automaton(fa.id)
+    assert not fa_database.delete_automaton(fa.id)
+    assert fa_database.load_automaton_by_id(fa.id) is None
+    for table in ("NFA_States", "NFA_Transitions", "NFA_InputTests"):
+        assert sql.execute(f"SELECT COUNT(*) FROM {table} WHERE nfa_id = ?",
+                           (fa.db_id,)).fetchone()[0] == 0
+    assert sql.execute("SELECT COUNT(*) FROM NFA_Conversions WHERE source_nfa_id = ? "
+                       "OR result_dfa_id = ?", (fa.db_id, fa.db_id)).fetchone()[0] == 0
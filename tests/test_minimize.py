@@ -0,0 +1,89 @@
+# test_minimize.py  ── minimize() gives the minimal, canonical DFA
+import random
+
+from fa_logic import FiniteAutomaton, equivalent
+
+
+def random_dfa(rnd, n, symbols="ab", sink=False):
+    states = [f"s{i}" for i in range(n)]
+    delta = {s: {a: rnd.choice(states) for a in symbols if rnd.random() < 0.8}
+             for s in states}
+    if sink:                        # explicit dead state completing every row
+        delta["dead"] = {a: "dead" for a in symbols}
+        for s in states:
+            for a in symbols:
+                delta[s].setdefault(a, "dead")
+        states.append("dead")
+    accept = {s for s in states[:n] if rnd.random() < 0.3}
+    return FiniteAutomaton(None, "r", set(states), set(symbols), delta, "s0", accept, True)
+
+
+def is_minimal(fa) -> bool:
+    """Every state reachable and able to accept, no two states equivalent."""
+    states, delta = sorted(fa.states), fa.transitions.to_dict()
+    symbols = sorted(fa.alphabet)
+    if not fa.accept_states:
+        return len(states) == 1
+    live = set(fa.accept_states)
+    changed = True
+    while changed:
+        changed = False
+        for s in states:
+            if s not in live and any(delta.get(s, {}).get(a) in live for a in symbols):
+                live.add(s)
+                changed = True
+    if live != set(states):
+        return False
+    # pairs told apart by some word, found backwards from (accept, reject)
+    distinct = {(p, q) for p in states for q in states
+                if (p in fa.accept_states) != (q in fa.accept_states)}
+    changed = True
+    while changed:
+        changed = False
+        for p in states:
+            for q in states:
+                if p != q and (p, q) not in distinct:
+                    for a in symbols:
+                        x, y = delta.get(p, {}).get(a), delta.get(q, {}).get(a)
+                        if (x is None) != (y is None) or (x, y) in distinct:
+                            distinct.add((p, q))
+                            changed = True
+                            break
+    return all((p, q) in distinct for p in states for q in states if p != q)
+
+
+def test_explicit_dead_state_is_dropped():
+    fa = FiniteAutomaton(None, "x", {"p", "q", "d"}, {"a", "b"},
+                         {"p": {"a": "q", "b": "d"}, "d": {"a": "d", "b": "d"}},
+                         "p", {"q"}, True)
+    m = fa.minimize()
+    assert len(m.states) == 2
+    assert is_minimal(m)
+    assert equivalent(fa, m)[0]
+
+
+def test_random_dfas_are_minimal_and_canonical():
+    rnd = random.Random(0)
+    for _ in range(300):
+        seed = rnd.randrange(1 << 30)
+        n = rnd.randint(1, 8)
+        fa = random_dfa(random.Random(seed), n)
+        with_sink = random_dfa(random.Random(seed), n, sink=True)
+        m, ms = fa.minimize(), with_sink.minimize()
+        assert equivalent(fa, m)[0] and equivalent(with_sink, ms)[0]
+        assert is_minimal(m) and is_minimal(ms)
+        assert m.fingerprint() == ms.fingerprint()
+
+
+def test_converted_nfas_minimize_to_equal_fingerprints():
+    rnd = random.Random(1)
+    for _ in range(100):
+        n = rnd.randint(1, 6)
+        states = [f"s{i}" for i in range(n)]
+        delta = {s: {a: rnd.sample(states, rnd.randint(1, n))
+                     for a in "ab" if rnd.random() < 0.7} for s in states}
+        nfa = FiniteAutomaton(None, "n", set(states), {"a", "b"}, delta, "s0",
+                              {s for s in states if rnd.random() < 0.3}, False)
+        m = nfa.convert_to_dfa().minimize()
+        assert is_minimal(m)
+        assert m.fingerprint() == m.minimize().fingerprint()
@@ -0,0 +1,51 @@
+# test_regex.py  ── from_regex against re.fullmatch, and the rejected syntax
+import random
+import re
+
+import pytest
+
+from fa_regex import from_regex
+
+PATTERNS = [
+    "", "a", "ab|c", "(a|b)*abb", "a+b?c*", "(ab)?(ba)+", "[a-c]{2,4}", "a{3}",
+    "a{2,}b", "[^a]b", r"\d+", r"\w\s\W", r"[\d_]+", r"\S+", r"a\.b", ".*c",
+    "x(y|z)?x", "[ab-]+", "((a|b)c)*d",
+]
+CHARS = "abcxyz0_-. "
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+@pytest.mark.parametrize("dfa", [False, True])
+def test_agrees_with_re(pattern, dfa):
+    fa = from_regex(pattern, dfa=dfa)
+    rnd = random.Random(pattern)
+    words = ["", "ab", "abb"] + ["".join(rnd.choices(CHARS, k=rnd.randint(0, 7)))
+                                 for _ in range(300)]
+    for w in words:
+        assert fa.simulate(w) == bool(re.fullmatch(pattern, w)), (pattern, w)
+
+
+def test_ignore_case():
+    fa = from_regex("ab[c-e]", ignore_case=True)
+    assert fa.simulate("AbD") and fa.simulate("abe") and not fa.simulate("abf")
+
+
+@pytest.mark.parametrize("pattern", [
+    "^a", "a$", r"\b", r"a\Z", r"[a-\d]", r"[\d-z]", "a+?", "a??", "a*?",
+    "x{2}?", "a**", "a{2}{3}", "ε", "aε", "[ε]", "[δ-ζ]", "*a", "(a", "a)",
+    "[ab", "a{2", "a{3,1}", "\\",
+])
+def test_rejected(pattern):
+    with pytest.raises(ValueError):
+        from_regex(pattern)
+
+
+def test_epsilon_never_enters_the_alphabet():
+    fa = from_regex(".", alphabet="abε")
+    assert fa.alphabet == {"a", "b"}
+    assert not fa.simulate("ε") and not fa.simulate("")
+
+
+def test_grouped_quantifiers_still_nest():
+    fa = from_regex("(a+)?b(c{2})*")
+    assert fa.simulate("b") and fa.simulate("aabcccc") and not fa.simulate("abccc")
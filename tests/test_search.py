@@ -0,0 +1,68 @@
+# test_search.py  ── finditer against a brute-force leftmost-longest scan
+import random
+import re
+
+import pytest
+
+import fa_search
+from fa_regex import from_regex
+
+PATTERNS = ["a|abac", "ab*", "(ab|ba)+", "a+b?", "b(a|b)*a", "[ab]{2,3}", "aa|aaab"]
+
+
+def reference(pattern, text):
+    """Non-overlapping, leftmost-longest, non-empty matches, membership
+    decided by re.fullmatch."""
+    out, i = [], 0
+    while i < len(text):
+        end = next((j for j in range(len(text), i, -1)
+                    if re.fullmatch(pattern, text[i:j])), None)
+        if end is None:
+            i += 1
+        else:
+            out.append((i, end))
+            i = end
+    return out
+
+
+def test_match_after_pending_candidate_at_end_of_input():
+    assert list(from_regex("a|abac", dfa=True).finditer("aba")) == [(0, 1), (2, 3)]
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+@pytest.mark.parametrize("dfa", [False, True])
+def test_random_texts(pattern, dfa):
+    rnd = random.Random(pattern)
+    fa = from_regex(pattern, dfa=dfa)
+    for _ in range(200):
+        text = "".join(rnd.choice("abc") for _ in range(rnd.randint(0, 12)))
+        assert list(fa.finditer(text)) == reference(pattern, text), text
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_chunked_input(pattern):
+    rnd = random.Random(pattern)
+    fa = from_regex(pattern)
+    for _ in range(100):
+        text = "".join(rnd.choice("ab") for _ in range(rnd.randint(0, 20)))
+        cuts = sorted(rnd.sample(range(len(text) + 1), min(3, len(text) + 1)))
+        chunks = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+        assert list(fa.finditer(chunks)) == reference(pattern, text), chunks
+
+
+def test_nested_scan_resetting_the_memo(monkeypatch):
+    # a chunk source that searches the same automaton between chunks makes
+    # that inner scan reset the shared memo while the outer one is mid-match
+    monkeypatch.setattr(fa_search, "MEMO_LIMIT", 2)
+    pattern = "(ab|ba)+c"
+    fa = from_regex(pattern)
+    rnd = random.Random(1)
+    for _ in range(50):
+        text = "".join(rnd.choice("abc") for _ in range(30))
+        noise = "".join(rnd.choice("abc") for _ in range(30))
+
+        def chunks():
+            for i in range(0, len(text), 3):
+                assert list(fa.finditer(noise)) == reference(pattern, noise)
+                yield text[i:i + 3]
+        assert list(fa.finditer(chunks())) == reference(pattern, text), text